@@ -147,7 +147,7 @@ def extract_entities_with_comprehend(text):
             if entity['Score'] > 0.7:  # Only include high-confidence entities
                 entities.append(entity['Text'])
         
-        return list(set(entities))  # Remove duplicates
+        return list(dict.fromkeys(entities))  # Remove duplicates, keeping first-seen order
         
     except Exception as e:
         print(f"Comprehend entity extraction failed: {str(e)}")
@@ -154,21 +154,20 @@ class AnalyzerAgent:
             entity_frequencies = {}
             document_entities = {}
             
-            for i, doc in enumerate(documents):
-                content = doc.get("content", "")
-                if content:
-                    # Extract entities using AWS Comprehend
-                    entities = await self.aws_tools.extract_entities(content)
-                    
-                    # Store entities for this document
-                    document_entities[f"doc_{i}"] = entities
-                    
-                    # Aggregate all entities
-                    all_entities.extend(entities)
-                    
-                    # Count entity frequencies
-                    for entity in entities:
-                        entity_frequencies[entity] = entity_frequencies.get(entity, 0) + 1
+            # Extract entities for all documents with content in batched Comprehend calls
+            indexed_contents = [(i, doc.get("content", "")) for i, doc in enumerate(documents) if doc.get("content", "")]
+            entities_per_doc = await self.aws_tools.extract_entities_batch([content for _, content in indexed_contents])
+            
+            for (i, _), entities in zip(indexed_contents, entities_per_doc):
+                # Store entities for this document
+                document_entities[f"doc_{i}"] = entities
+                
+                # Aggregate all entities
+                all_entities.extend(entities)
+                
+                # Count entity frequencies
+                for entity in entities:
+                    entity_frequencies[entity] = entity_frequencies.get(entity, 0) + 1
             
             # Get top entities
             top_entities = sorted(
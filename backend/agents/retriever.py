@@ -11,6 +11,9 @@ from utils.logger import AgentLogger
 
 logger = AgentLogger("RetrieverAgent")
 
+# Documents below this certainty are dropped (applied by Weaviate during the search)
+MIN_CERTAINTY = 0.3
+
 class RetrieverAgent:
     """Agent responsible for retrieving relevant documents from the knowledge base"""
     
@@ -61,7 +64,7 @@ class RetrieverAgent:
             
             # Query documents from Weaviate
             logger.log_tool_call("query_documents", {"query": query, "limit": limit})
-            documents = await self.weaviate_client.query_documents(query, limit)
+            documents = await self.weaviate_client.query_documents(query, limit, min_certainty=MIN_CERTAINTY)
             
             # Filter and rank documents
             filtered_docs = await self._filter_documents(documents, query)
@@ -103,7 +106,7 @@ class RetrieverAgent:
                 
                 # Check certainty score if available
                 certainty = doc.get("certainty", 0)
-                if certainty < 0.3:  # Low confidence threshold
+                if certainty < MIN_CERTAINTY:  # Low confidence threshold
                     continue
                 
                 # Check if document type is relevant
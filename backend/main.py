@@ -6,19 +6,18 @@ Multi-agent system using LlamaIndex, Weaviate, and Friendli AI
 """
 
 import os
+import asyncio
 import logging
+import orjson
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 import uvicorn
 
 from agents.orchestrator import AgentOrchestrator
-from services.weaviate_client import WeaviateClient
-from services.friendli_client import FriendliClient
-from services.gemini_client import GeminiClient
-from tools.aws_tools import AWSTools
+from services.bootstrap import initialize_services, shutdown_services
 from utils.logger import setup_logger
 
 # Load environment variables
@@ -41,19 +40,14 @@ async def lifespan(app: FastAPI):
     
     logger.info("🚀 Starting ContextCloud Agents...")
     
+    services = {}
     try:
         # Initialize clients
-        weaviate_client = WeaviateClient()
-        await weaviate_client.initialize()
-        
-        friendli_client = FriendliClient()
-        
-        gemini_client = GeminiClient()
-        await gemini_client.initialize()
-        
-        # aws_tools = AWSTools()
-        # await aws_tools.initialize()
-        aws_tools = None  # Temporarily disabled for testing
+        services = await initialize_services()
+        weaviate_client = services["weaviate_client"]
+        friendli_client = services["friendli_client"]
+        gemini_client = services["gemini_client"]
+        aws_tools = services["aws_tools"]
         
         # Initialize agent orchestrator
         agent_orchestrator = AgentOrchestrator(
@@ -72,13 +66,16 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🔄 Shutting down ContextCloud Agents...")
+    await shutdown_services(services)
 
 # Create FastAPI app
 app = FastAPI(
     title="ContextCloud Agents",
     description="Multi-agent enterprise knowledge platform for AWS AI Agents Hack Day",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Graph and search payloads are large nested structures; orjson encodes them in C
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -117,6 +114,9 @@ async def health_check():
                 "gemini": gemini_status,
                 "aws": aws_status
             },
+            "connection_pools": {
+                "weaviate": weaviate_client.pool_status() if weaviate_client else None
+            },
             "agents_ready": agent_orchestrator is not None
         }
     except Exception as e:
@@ -141,13 +141,13 @@ async def upload_document(
             raise HTTPException(status_code=400, detail="No file provided")
         
         # Process with AWS Textract
-        extracted_text = await aws_tools.extract_text_from_document(file)
+        extracted_text, file_bytes = await aws_tools.extract_text_from_document(file)
         
-        # Store in S3
-        s3_uri = await aws_tools.store_document_in_s3(file, extracted_text)
-        
-        # Extract entities with AWS Comprehend
-        entities = await aws_tools.extract_entities(extracted_text)
+        # Store in S3 and extract entities with AWS Comprehend; the two are independent
+        s3_uri, entities = await asyncio.gather(
+            aws_tools.store_document_in_s3(file, extracted_text, file_bytes),
+            aws_tools.extract_entities(extracted_text)
+        )
         
         # Store in Weaviate
         doc_id = await weaviate_client.store_document(
@@ -222,56 +222,125 @@ async def ask_friendli(query: dict):
         logger.error(f"❌ Friendli query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Friendli query failed: {str(e)}")
 
+# Nodes or links serialized per chunk of the streamed /graph response
+GRAPH_STREAM_CHUNK_ITEMS = 256
+
+def _graph_node(node: dict) -> dict:
+    """Transform a graph node to match frontend expectations"""
+    return {
+        "id": node.get("id"),
+        "name": node.get("label", node.get("name", "Unknown")),  # Use label as name
+        "type": node.get("type", "unknown"),
+        "size": 15 if node.get("type") == "department" else 12 if node.get("type") == "entity" else 10,
+        "color": node.get("color", "#888888"),
+        "summary": node.get("summary", ""),
+        "key_terms": node.get("key_terms", []),
+        "content_preview": node.get("content_preview", "")
+    }
+
+def _graph_link(edge: dict) -> dict:
+    """Transform a graph edge to a frontend link"""
+    return {
+        "source": edge.get("source"),
+        "target": edge.get("target"),
+        "type": edge.get("label", "related"),
+        "strength": 0.7  # Default strength
+    }
+
 @app.get("/graph")
-async def get_knowledge_graph():
-    """Retrieve the knowledge graph for frontend visualization"""
-    try:
-        logger.info("📊 Retrieving knowledge graph")
-        
-        # Get graph data from Weaviate
-        graph_data = await weaviate_client.get_knowledge_graph()
-        
-        # Transform nodes to match frontend expectations
-        transformed_nodes = []
-        for node in graph_data.get("nodes", []):
-            transformed_node = {
-                "id": node.get("id"),
-                "name": node.get("label", node.get("name", "Unknown")),  # Use label as name
-                "type": node.get("type", "unknown"),
-                "size": 15 if node.get("type") == "department" else 12 if node.get("type") == "entity" else 10,
-                "color": node.get("color", "#888888"),
-                "summary": node.get("summary", ""),
-                "key_terms": node.get("key_terms", []),
-                "content_preview": node.get("content_preview", "")
-            }
-            transformed_nodes.append(transformed_node)
-        
-        # Transform edges to match frontend expectations (source/target instead of source/target)
-        transformed_edges = []
-        for edge in graph_data.get("edges", []):
-            transformed_edge = {
-                "source": edge.get("source"),
-                "target": edge.get("target"),
-                "type": edge.get("label", "related"),
-                "strength": 0.7  # Default strength
-            }
-            transformed_edges.append(transformed_edge)
-        
-        transformed_graph = {
-            "nodes": transformed_nodes,
-            "links": transformed_edges  # Frontend expects "links" not "edges"
-        }
+async def get_knowledge_graph(compact: bool = False):
+    """Retrieve the knowledge graph for frontend visualization, streamed as it is generated
+    
+    With ?compact=true, links come back as base64 CSR arrays over node positions instead.
+    """
+    if not weaviate_client:
+        raise HTTPException(status_code=503, detail="Weaviate client not initialized")
+    
+    logger.info("📊 Retrieving knowledge graph")
+    
+    if compact:
+        try:
+            compact_graph = await weaviate_client.get_knowledge_graph(compact=True)
+        except Exception as e:
+            logger.error(f"❌ Graph retrieval failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Graph retrieval failed: {str(e)}")
         
         return {
             "message": "Knowledge graph retrieved",
-            "graph": transformed_graph,
-            "node_count": len(transformed_nodes),
-            "edge_count": len(transformed_edges)
+            "graph": {**compact_graph, "nodes": [_graph_node(node) for node in compact_graph["nodes"]]}
         }
-        
+    
+    items = weaviate_client.stream_knowledge_graph()
+    
+    # Pull the first item up front so setup failures still return a 500 instead of a truncated body
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
     except Exception as e:
         logger.error(f"❌ Graph retrieval failed: {e}")
         raise HTTPException(status_code=500, detail=f"Graph retrieval failed: {str(e)}")
+    
+    async def all_items():
+        if first is not None:
+            yield first
+        async for item in items:
+            yield item
+    
+    async def body():
+        counts = {"node": 0, "edge": 0}
+        pending = []
+        pending_kind = "node"
+        
+        def flush() -> bytes:
+            # One orjson call per batch of items; strip the list brackets to splice it into the open array
+            data = orjson.dumps(pending)[1:-1]
+            separator = b"," if counts[pending_kind] else b""
+            counts[pending_kind] += len(pending)
+            pending.clear()
+            return separator + data
+        
+        # Frontend expects "links" not "edges"; nodes always precede edges in the stream
+        yield b'{"message":"Knowledge graph retrieved","graph":{"nodes":['
+        async for kind, item in all_items():
+            if kind != pending_kind:
+                if pending:
+                    yield flush()
+                yield b'],"links":['
+                pending_kind = kind
+            
+            pending.append(_graph_link(item) if kind == "edge" else _graph_node(item))
+            if len(pending) >= GRAPH_STREAM_CHUNK_ITEMS:
+                yield flush()
+        
+        if pending:
+            yield flush()
+        if pending_kind == "node":
+            yield b'],"links":['
+        yield f']}},"node_count":{counts["node"]},"edge_count":{counts["edge"]}}}'.encode()
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+@app.get("/graph/nodes/{node_id}/neighbors")
+async def get_node_neighbors(node_id: str):
+    """Retrieve one node and its directly connected nodes, for expanding a subgraph on demand"""
+    if not weaviate_client:
+        raise HTTPException(status_code=503, detail="Weaviate client not initialized")
+    
+    try:
+        subgraph = await weaviate_client.get_node_neighbors(node_id)
+    except Exception as e:
+        logger.error(f"❌ Neighbor retrieval failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Neighbor retrieval failed: {str(e)}")
+    
+    if subgraph is None:
+        raise HTTPException(status_code=404, detail=f"Node not found: {node_id}")
+    
+    return {
+        "node": _graph_node(subgraph["node"]),
+        "neighbors": [_graph_node(node) for node in subgraph["neighbors"]],
+        "links": [_graph_link(edge) for edge in subgraph["edges"]]
+    }
 
 @app.post("/search/gemini")
 async def search_with_gemini(query: dict):
@@ -313,6 +382,47 @@ async def search_with_gemini(query: dict):
         logger.error(f"❌ Gemini search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Gemini search failed: {str(e)}")
 
+@app.post("/search/gemini/stream")
+async def stream_search_with_gemini(query: dict):
+    """Search knowledge graph using Gemini AI, streaming the summary as server-sent events"""
+    if not gemini_client:
+        raise HTTPException(status_code=503, detail="Gemini client not initialized")
+    
+    if not weaviate_client:
+        raise HTTPException(status_code=503, detail="Weaviate client not initialized")
+    
+    user_query = query.get("query", "").strip()
+    if not user_query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    
+    logger.info(f"🔍 Gemini streaming search query: {user_query}")
+    
+    try:
+        graph_data = await weaviate_client.get_knowledge_graph()
+        search_result = await gemini_client.find_relevant_nodes(user_query, graph_data["nodes"])
+    except Exception as e:
+        logger.error(f"❌ Gemini search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Gemini search failed: {str(e)}")
+    
+    relevant_nodes = search_result.get("relevant_nodes", [])
+    
+    async def events():
+        # Nodes first so the graph can update before the summary finishes
+        yield "event: nodes\ndata: " + orjson.dumps({
+            "query": user_query,
+            "relevant_nodes": relevant_nodes,
+            "analysis_summary": search_result.get("analysis_summary", ""),
+            "total_nodes_searched": len(graph_data["nodes"]),
+            "relevant_nodes_found": len(relevant_nodes)
+        }).decode() + "\n\n"
+        
+        async for chunk in gemini_client.stream_summary(user_query, relevant_nodes):
+            yield "event: summary\ndata: " + orjson.dumps(chunk).decode() + "\n\n"
+        
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/insights/generate")
 async def generate_ai_insights(request: dict):
     """Generate AI insights based on current query and knowledge graph data"""
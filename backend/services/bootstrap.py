@@ -0,0 +1,51 @@
+"""
+Service bootstrap for ContextCloud Agents
+Creates the shared service clients used by the FastAPI application
+"""
+
+import os
+from typing import Dict, Any
+
+from services.weaviate_client import get_weaviate_client
+from services.friendli_client import FriendliClient
+from tools.aws_tools import AWSTools
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def gemini_enabled() -> bool:
+    """Gemini routes can be switched off at runtime with ENABLE_GEMINI=0"""
+    return os.getenv("ENABLE_GEMINI", "1") == "1"
+
+async def initialize_services() -> Dict[str, Any]:
+    """Initialize all shared service clients"""
+    # One connected client for the whole process; handlers reuse it rather than reconnecting
+    weaviate_client = await get_weaviate_client()
+
+    friendli_client = FriendliClient()
+
+    gemini_client = None
+    if gemini_enabled():
+        # Imported lazily so disabled deployments skip the google-generativeai import
+        from services.gemini_client import GeminiClient
+        gemini_client = GeminiClient()
+        await gemini_client.initialize()
+    else:
+        logger.info("⚠️ Gemini disabled via ENABLE_GEMINI")
+
+    # AWS clients are created on first use; startup only touches AWS when AWS_ENABLED=1
+    aws_tools = AWSTools()
+    await aws_tools.initialize()
+
+    return {
+        "weaviate_client": weaviate_client,
+        "friendli_client": friendli_client,
+        "gemini_client": gemini_client,
+        "aws_tools": aws_tools
+    }
+
+async def shutdown_services(services: Dict[str, Any]):
+    """Release resources held by the shared service clients"""
+    weaviate_client = services.get("weaviate_client")
+    if weaviate_client:
+        await weaviate_client.close()
@@ -12,6 +12,33 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# System message shared by every chat completion; only the user turn varies per call
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are ContextCloud, an AI assistant specialized in enterprise knowledge management and compliance intelligence. Provide clear, accurate, and actionable insights based on the provided context."
+}
+
+# Room for every INSIGHTS_SCHEMA field at the sizes the prompt asks for (five short list items,
+# a few-sentence summary); output is cut off at this limit, constrained decoding or not
+INSIGHTS_MAX_TOKENS = 1000
+
+# JSON schema enforced through constrained decoding in extract_insights
+INSIGHTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "key_topics": {"type": "array", "items": {"type": "string"}},
+        "important_entities": {"type": "array", "items": {"type": "string"}},
+        "sentiment": {"type": "string", "enum": ["positive", "negative", "neutral"]},
+        "compliance_mentions": {"type": "array", "items": {"type": "string"}},
+        "action_items": {"type": "array", "items": {"type": "string"}},
+        "summary": {"type": "string"}
+    },
+    "required": [
+        "key_topics", "important_entities", "sentiment",
+        "compliance_mentions", "action_items", "summary"
+    ]
+}
+
 class FriendliClientWrapper:
     """Wrapper for Friendli AI client with enhanced functionality"""
     
@@ -38,7 +65,14 @@ class FriendliClientWrapper:
             logger.error(f"❌ Failed to initialize Friendli client: {e}")
             raise
     
-    async def query(self, prompt: str, context: Optional[str] = None) -> str:
+    async def query(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> str:
         """Send a query to Friendli AI for reasoning"""
         try:
             if not self.client:
@@ -49,21 +83,16 @@ class FriendliClientWrapper:
             
             logger.info(f"🧠 Querying Friendli AI: {prompt[:50]}...")
             
+            # Only pass response_format when structured output is requested
+            extra_args = {"response_format": response_format} if response_format else {}
+            
             # Generate response using Friendli
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are ContextCloud, an AI assistant specialized in enterprise knowledge management and compliance intelligence. Provide clear, accurate, and actionable insights based on the provided context."
-                    },
-                    {
-                        "role": "user",
-                        "content": full_prompt
-                    }
-                ],
-                max_tokens=1000,
-                temperature=0.7
+                messages=[_SYSTEM_MSG, {"role": "user", "content": full_prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **extra_args
             )
             
             result = response.choices[0].message.content
@@ -139,22 +168,23 @@ class FriendliClientWrapper:
             
             {text}
             
-            Please provide a JSON response with the following structure:
-            {{
-                "key_topics": ["topic1", "topic2", "topic3"],
-                "important_entities": ["entity1", "entity2", "entity3"],
-                "sentiment": "positive/negative/neutral",
-                "compliance_mentions": ["compliance1", "compliance2"],
-                "action_items": ["action1", "action2"],
-                "summary": "brief summary of the content"
-            }}
-            
-            Return only the JSON object, no additional text.
+            Respond with a single JSON object with the keys key_topics, important_entities, sentiment,
+            compliance_mentions, action_items and summary. Keep each list to at most five short items
+            and the summary to two or three sentences. Return only the JSON object, no additional text.
             """
             
-            response = await self.query(insights_prompt)
+            # Constrained decoding keeps the response on INSIGHTS_SCHEMA until it hits max_tokens
+            response = await self.query(
+                insights_prompt,
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {"name": "insights", "schema": INSIGHTS_SCHEMA}
+                },
+                temperature=0.0,
+                max_tokens=INSIGHTS_MAX_TOKENS
+            )
             
-            # Try to parse JSON response
+            # A reply cut off at max_tokens is incomplete JSON
             try:
                 insights = json.loads(response)
                 logger.info("✅ Insights extraction completed")
@@ -4,19 +4,94 @@ Handles Google Generative AI integration for node search and analysis
 """
 
 import os
+import copy
+import asyncio
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import functools
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, TypedDict
+import numpy as np
+import orjson
 import google.generativeai as genai
 from utils.logger import setup_logger
+from utils.semantic_cache import SemanticCache
+from utils.vector_index import normalize
 
 logger = setup_logger(__name__)
 
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_SIZE = 100  # batchEmbedContents request limit
+QUERY_EMBEDDING_CACHE_SIZE = 256
+NODE_EMBEDDING_CACHE_SIZE = 10000
+LEGEND_MAX_INLINE_TERM_LENGTH = 4  # shared terms this short or shorter stay inline in search prompts
+
+class RankedNode(TypedDict):
+    id: str
+    relevance_score: float
+    reasoning: str
+
+class SearchResponse(TypedDict):
+    analysis_summary: str
+    relevant_nodes: List[RankedNode]
+
+class InsightsResponse(TypedDict):
+    summary: str
+    key_findings: List[str]
+    relationship_patterns: str
+    knowledge_gaps: str
+    strategic_insights: str
+    data_quality_assessment: str
+    suggested_next_steps: List[str]
+    confidence_score: int
+
+# Structured output: Gemini replies with JSON matching these schemas, so no regex extraction is needed
+SEARCH_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": SearchResponse}
+INSIGHTS_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": InsightsResponse}
+
+def _node_ids(nodes: List[Dict]) -> List[str]:
+    """Sorted node ids, used to scope cached answers to the nodes they were computed from"""
+    return sorted(str(node.get("id", "")) for node in nodes)
+
+def semantic_cached(scope: Callable[..., Any]):
+    """
+    Serve a GeminiClient method from the client's semantic cache
+    
+    The method must take the query as its first argument; `scope` receives the
+    remaining arguments and returns what else the answer depends on.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, query, *args, **kwargs):
+            if self.cache is None:
+                return await method(self, query, *args, **kwargs)
+            return await self.cache.get_or_compute(
+                query,
+                [method.__name__, scope(*args, **kwargs)],
+                lambda: method(self, query, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
 class GeminiClient:
     """Gemini client for AI-powered node search and analysis"""
     
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.model = None
+        self.transport = os.getenv("GEMINI_TRANSPORT", "grpc")
+        # Bounds in-flight generate_content_async calls across concurrent requests
+        self._concurrency = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "32")))
+        self.cache: Optional[SemanticCache] = None
+        # Only the top-k nodes by embedding similarity are sent to Gemini for ranking
+        self.prerank_top_k = int(os.getenv("GEMINI_PRERANK_TOP_K", "20"))
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._node_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # (checked_at, status) of the last health probe, reused for GEMINI_HEALTH_TTL_SECONDS
+        self.health_ttl_seconds = float(os.getenv("GEMINI_HEALTH_TTL_SECONDS", "30"))
+        self._last_health = (0.0, "unknown")
         
     async def initialize(self):
         """Initialize Gemini client"""
@@ -26,18 +101,120 @@ class GeminiClient:
             
             logger.info("🤖 Initializing Gemini client...")
             
-            # Configure Gemini
-            genai.configure(api_key=self.api_key)
+            # Configure Gemini; the default gRPC transport keeps one persistent HTTP/2
+            # channel per service client, so every call reuses the same TLS session
+            genai.configure(api_key=self.api_key, transport=self.transport)
             
             # Initialize the model
             self.model = genai.GenerativeModel('gemini-2.5-flash')
             
+            if os.getenv("GEMINI_PREWARM", "1") == "1":
+                await self._prewarm()
+            
+            # Cache answers for repeated and paraphrased queries
+            self.cache = SemanticCache(
+                self.embed_query,
+                threshold=float(os.getenv("GEMINI_CACHE_THRESHOLD", "0.95")),
+                ttl_seconds=float(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600")),
+                max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "1000"))
+            )
+            
             logger.info("✅ Gemini client initialized successfully")
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize Gemini client: {e}")
             raise
     
+    async def _prewarm(self):
+        """Open the generation channel at startup so the first request skips the TLS handshake"""
+        try:
+            # count_tokens goes through the same async service client as generation but costs nothing
+            await self.model.count_tokens_async("ping")
+            logger.info(f"🔥 Pre-warmed Gemini {self.transport} channel")
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini pre-warm failed: {e}")
+    
+    async def _generate(self, prompt: str, **kwargs):
+        """Run generate_content without blocking the event loop, bounded by GEMINI_MAX_CONCURRENCY"""
+        async with self._concurrency:
+            return await self.model.generate_content_async(prompt, **kwargs)
+    
+    async def _generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Yield response text chunks as Gemini produces them, holding a concurrency slot until done"""
+        async with self._concurrency:
+            response = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+    
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """Embed a query for cache lookups and pre-ranking, or None if embedding fails"""
+        embedding = self._query_embeddings.get(text)
+        if embedding is not None:
+            self._query_embeddings.move_to_end(text)
+            return embedding
+        
+        try:
+            result = await asyncio.to_thread(
+                genai.embed_content, model=EMBEDDING_MODEL, content=text, task_type="retrieval_query"
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Query embedding failed: {e}")
+            return None
+        
+        embedding = self._query_embeddings[text] = result["embedding"]
+        if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embedding
+    
+    async def _embed_nodes(self, nodes: List[Dict[str, Any]]) -> List[np.ndarray]:
+        """Unit-length embeddings for nodes, computed once per node text and cached"""
+        texts = [
+            f"{node.get('label', '')}: {node.get('summary', '')} {' '.join(node.get('key_terms', []))}"
+            for node in nodes
+        ]
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        
+        missing = list({key: text for key, text in zip(keys, texts) if key not in self._node_embeddings}.items())
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[start:start + EMBED_BATCH_SIZE]
+            result = await asyncio.to_thread(
+                genai.embed_content,
+                model=EMBEDDING_MODEL,
+                content=[text for _, text in batch],
+                task_type="retrieval_document"
+            )
+            for (key, _), embedding in zip(batch, result["embedding"]):
+                self._node_embeddings[key] = normalize(embedding)
+        
+        vectors = []
+        for key in keys:
+            self._node_embeddings.move_to_end(key)
+            vectors.append(self._node_embeddings[key])
+        while len(self._node_embeddings) > max(NODE_EMBEDDING_CACHE_SIZE, len(keys)):
+            self._node_embeddings.popitem(last=False)
+        return vectors
+    
+    async def _prerank_nodes(self, query: str, nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the prerank_top_k nodes closest to the query so the Gemini prompt stays small"""
+        top_k = self.prerank_top_k
+        if top_k <= 0 or len(nodes) <= top_k:
+            return nodes
+        
+        try:
+            query_embedding = await self.embed_query(query)
+            if query_embedding is None:
+                return nodes
+            
+            scores = np.stack(await self._embed_nodes(nodes)) @ normalize(query_embedding)
+            top = np.argpartition(-scores, top_k)[:top_k]
+            top = top[np.argsort(-scores[top])]
+            return [nodes[i] for i in top]
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding pre-rank failed, sending all nodes to Gemini: {e}")
+            return nodes
+    
     async def find_relevant_nodes(self, query: str, nodes: List[Dict[str, Any]], limit: int = 10) -> Dict[str, Any]:
         """
         Find the most relevant nodes based on query using Gemini AI
@@ -53,31 +230,21 @@ class GeminiClient:
         try:
             logger.info(f"🔍 Finding relevant nodes for query: {query}")
             
+            # Every node fits in the answer, so there is nothing for Gemini to rank
+            if len(nodes) <= limit:
+                result = self._all_nodes_result(nodes)
+                logger.info(f"✅ Found {len(result['relevant_nodes'])} relevant nodes (no ranking needed)")
+                return result
+            
             if not self.model:
                 raise Exception("Gemini client not initialized")
             
-            # Prepare node summaries for analysis
-            node_summaries = []
-            for i, node in enumerate(nodes):
-                summary = {
-                    "id": node.get("id", f"node_{i}"),
-                    "label": node.get("label", "Unknown"),
-                    "type": node.get("type", "unknown"),
-                    "summary": node.get("summary", ""),
-                    "key_terms": node.get("key_terms", []),
-                    "content_preview": node.get("content_preview", ""),
-                    "entities": node.get("entities", [])
-                }
-                node_summaries.append(summary)
-            
-            # Create prompt for Gemini
-            prompt = self._create_search_prompt(query, node_summaries, limit)
-            
-            # Query Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Parse response
-            result = self._parse_search_response(response.text, nodes)
+            try:
+                # Cached rankings are shared across requests (and paraphrases); hand out a private copy
+                result = copy.deepcopy(await self._rank_nodes(query, nodes, limit))
+            except ValueError as e:
+                logger.error(f"❌ Failed to parse Gemini response: {e}")
+                result = self._fallback_search_result(nodes)
             
             logger.info(f"✅ Found {len(result['relevant_nodes'])} relevant nodes")
             
@@ -87,27 +254,73 @@ class GeminiClient:
             logger.error(f"❌ Failed to find relevant nodes: {e}")
             raise
     
+    @semantic_cached(lambda nodes, limit=10: {"limit": limit, "node_ids": _node_ids(nodes)})
+    async def _rank_nodes(self, query: str, nodes: List[Dict[str, Any]], limit: int = 10) -> Dict[str, Any]:
+        """Ask Gemini to rank nodes for the query; raises ValueError on an unparseable reply"""
+        candidates = await self._prerank_nodes(query, nodes)
+        
+        # Prepare node summaries for analysis
+        node_summaries = []
+        for i, node in enumerate(candidates):
+            summary = {
+                "id": node.get("id", f"node_{i}"),
+                "label": node.get("label", "Unknown"),
+                "type": node.get("type", "unknown"),
+                "summary": node.get("summary", ""),
+                "key_terms": node.get("key_terms", []),
+                "content_preview": node.get("content_preview", ""),
+                "entities": node.get("entities", [])
+            }
+            node_summaries.append(summary)
+        
+        # Create prompt for Gemini
+        prompt = self._create_search_prompt(query, node_summaries, limit)
+        
+        # Query Gemini
+        response = await self._generate(prompt, generation_config=SEARCH_GENERATION_CONFIG)
+        
+        # Parse response
+        return self._parse_search_response(response.text, nodes)
+    
     def _create_search_prompt(self, query: str, node_summaries: List[Dict], limit: int) -> str:
         """Create a prompt for Gemini to analyze node relevance"""
         
-        nodes_text = ""
-        for node in node_summaries:
-            nodes_text += f"""
+        # Terms shared by several nodes are written once in a legend and referenced by code
+        term_counts = Counter(
+            term for node in node_summaries
+            for term in set(node['key_terms']) | set(node['entities'])
+        )
+        shared_terms = sorted(t for t, n in term_counts.items() if n > 1 and len(t) > LEGEND_MAX_INLINE_TERM_LENGTH)
+        codes = {term: f"T{i}" for i, term in enumerate(shared_terms)}
+        encode = lambda terms: ', '.join(codes.get(term, term) for term in terms)
+        
+        legend_text = "\n".join(f"{code} = {term}" for term, code in codes.items())
+        if legend_text:
+            legend_text = f"""
+Term Legend (Key Terms and Entities below use these codes):
+{legend_text}
+"""
+        
+        # Build per-node blocks and join once rather than growing a string with +=
+        nodes_text = "".join([
+            f"""
 Node ID: {node['id']}
 Label: {node['label']}
 Type: {node['type']}
 Summary: {node['summary']}
-Key Terms: {', '.join(node['key_terms'])}
-Entities: {', '.join(node['entities'])}
+Key Terms: {encode(node['key_terms'])}
+Entities: {encode(node['entities'])}
 Content Preview: {node['content_preview']}
 ---
 """
+            for node in node_summaries
+        ])
         
         prompt = f"""
 You are an AI assistant helping to find the most relevant nodes in a knowledge graph based on a user query.
 
 User Query: "{query}"
-
+{legend_text}
 Available Nodes:
 {nodes_text}
 
@@ -117,75 +330,65 @@ Please analyze each node and determine which ones are most relevant to the user
 3. Context and meaning of the summary
 4. Overall usefulness for answering the query
 
-Return your response in the following JSON format:
-{{
-    "analysis_summary": "Brief explanation of your analysis and findings",
-    "relevant_node_ids": ["node_id_1", "node_id_2", "node_id_3"],
-    "relevance_scores": {{
-        "node_id_1": 0.95,
-        "node_id_2": 0.87,
-        "node_id_3": 0.76
-    }},
-    "reasoning": {{
-        "node_id_1": "Why this node is relevant",
-        "node_id_2": "Why this node is relevant",
-        "node_id_3": "Why this node is relevant"
-    }}
-}}
+In analysis_summary, briefly explain your analysis and findings. In relevant_nodes, give each
+node's ID, a relevance_score (0.0 to 1.0) and the reasoning for why it is relevant.
 
-Please return the top {limit} most relevant nodes, ranked by relevance score (0.0 to 1.0).
+Please return the top {limit} most relevant nodes, ranked by relevance score.
 """
         
         return prompt
     
     def _parse_search_response(self, response_text: str, original_nodes: List[Dict]) -> Dict[str, Any]:
         """Parse Gemini response and return structured results"""
-        try:
-            import json
-            import re
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if not json_match:
-                raise Exception("No JSON found in Gemini response")
-            
-            json_str = json_match.group()
-            parsed_response = json.loads(json_str)
-            
-            # Get relevant nodes
-            relevant_node_ids = parsed_response.get("relevant_node_ids", [])
-            relevance_scores = parsed_response.get("relevance_scores", {})
-            reasoning = parsed_response.get("reasoning", {})
-            
-            # Find the actual node objects
-            relevant_nodes = []
-            for node in original_nodes:
-                node_id = node.get("id")
-                if node_id in relevant_node_ids:
-                    enhanced_node = node.copy()
-                    enhanced_node["relevance_score"] = relevance_scores.get(node_id, 0.0)
-                    enhanced_node["relevance_reasoning"] = reasoning.get(node_id, "")
-                    relevant_nodes.append(enhanced_node)
-            
-            # Sort by relevance score
-            relevant_nodes.sort(key=lambda x: x.get("relevance_score", 0.0), reverse=True)
-            
-            return {
-                "analysis_summary": parsed_response.get("analysis_summary", ""),
-                "relevant_nodes": relevant_nodes,
-                "total_analyzed": len(original_nodes),
-                "total_relevant": len(relevant_nodes)
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to parse Gemini response: {e}")
-            # Fallback: return first few nodes
-            return {
-                "analysis_summary": "Failed to parse AI analysis, showing first available nodes",
-                "relevant_nodes": original_nodes[:5],
-                "total_analyzed": len(original_nodes),
-                "total_relevant": min(5, len(original_nodes))
-            }
+        # The reply is schema-constrained JSON (SEARCH_GENERATION_CONFIG)
+        parsed_response = orjson.loads(response_text)
+        
+        # Find the actual node objects, keeping Gemini's ranking order
+        by_id = {node.get("id"): node for node in original_nodes}
+        seen_ids = set()
+        relevant_nodes = []
+        for item in parsed_response.get("relevant_nodes", []):
+            node_id = item.get("id")
+            node = by_id.get(node_id)
+            if node is None or node_id in seen_ids:
+                continue
+            seen_ids.add(node_id)
+            enhanced_node = node.copy()
+            enhanced_node["relevance_score"] = item.get("relevance_score", 0.0)
+            enhanced_node["relevance_reasoning"] = item.get("reasoning", "")
+            relevant_nodes.append(enhanced_node)
+        
+        return {
+            "analysis_summary": parsed_response.get("analysis_summary", ""),
+            "relevant_nodes": relevant_nodes,
+            "total_analyzed": len(original_nodes),
+            "total_relevant": len(relevant_nodes)
+        }
+    
+    def _all_nodes_result(self, original_nodes: List[Dict]) -> Dict[str, Any]:
+        """Result for inputs no larger than the limit: return every node at full relevance"""
+        relevant_nodes = []
+        for node in original_nodes:
+            enhanced_node = node.copy()
+            enhanced_node["relevance_score"] = 1.0
+            enhanced_node["relevance_reasoning"] = "Included without ranking: the graph has no more nodes than requested"
+            relevant_nodes.append(enhanced_node)
+        
+        return {
+            "analysis_summary": "No nodes to analyze." if not original_nodes else f"All {len(original_nodes)} nodes returned.",
+            "relevant_nodes": relevant_nodes,
+            "total_analyzed": len(original_nodes),
+            "total_relevant": len(relevant_nodes)
+        }
+    
+    def _fallback_search_result(self, original_nodes: List[Dict]) -> Dict[str, Any]:
+        """Fallback when Gemini's answer cannot be parsed: return first few nodes"""
+        return {
+            "analysis_summary": "Failed to parse AI analysis, showing first available nodes",
+            "relevant_nodes": original_nodes[:5],
+            "total_analyzed": len(original_nodes),
+            "total_relevant": min(5, len(original_nodes))
+        }
     
     async def generate_summary(self, query: str, relevant_nodes: List[Dict[str, Any]]) -> str:
         """Generate a summary of findings based on the query and relevant nodes"""
@@ -193,37 +396,64 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
             if not relevant_nodes:
                 return "No relevant information found for your query."
             
-            # Create summary prompt
-            nodes_text = "\n".join([
-                f"- {node['label']}: {node.get('summary', 'No summary available')}"
-                for node in relevant_nodes[:10]  # Limit to top 10 for summary
-            ])
-            
-            summary_prompt = f"""
-            Based on the user's query: "{query}"
-            
-            Here are the most relevant findings from the knowledge graph:
-            {nodes_text}
-            
-            Please provide a comprehensive summary that:
-            1. Directly answers the user's query
-            2. Highlights the key findings and connections
-            3. Provides actionable insights where applicable
-            4. Is written in a clear, professional tone
-            
-            Summary:
-            """
-            
-            response = self.model.generate_content(summary_prompt)
-            summary = response.text.strip()
-            
-            logger.info(f"✅ Generated summary for query: {query}")
-            return summary
+            return await self._summarize(query, relevant_nodes[:10])  # Limit to top 10 for summary
             
         except Exception as e:
             logger.error(f"❌ Failed to generate summary: {e}")
             return f"Unable to generate summary. Found {len(relevant_nodes)} relevant items related to your query."
     
+    async def stream_summary(self, query: str, relevant_nodes: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Stream the summary of findings chunk by chunk so callers can render it as it arrives"""
+        if not relevant_nodes:
+            yield "No relevant information found for your query."
+            return
+        
+        streamed = False
+        try:
+            async for chunk in self._generate_stream(self._create_summary_prompt(query, relevant_nodes[:10])):
+                streamed = True
+                yield chunk
+            
+            logger.info(f"✅ Streamed summary for query: {query}")
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to stream summary: {e}")
+            if not streamed:
+                yield f"Unable to generate summary. Found {len(relevant_nodes)} relevant items related to your query."
+    
+    @semantic_cached(lambda relevant_nodes: _node_ids(relevant_nodes))
+    async def _summarize(self, query: str, relevant_nodes: List[Dict[str, Any]]) -> str:
+        """Ask Gemini to summarize the relevant nodes for the query"""
+        response = await self._generate(self._create_summary_prompt(query, relevant_nodes))
+        summary = response.text.strip()
+        
+        logger.info(f"✅ Generated summary for query: {query}")
+        return summary
+    
+    def _create_summary_prompt(self, query: str, relevant_nodes: List[Dict[str, Any]]) -> str:
+        """Create a prompt for Gemini to summarize the relevant nodes"""
+        nodes_text = "\n".join([
+            f"- {node['label']}: {node.get('summary', 'No summary available')}"
+            for node in relevant_nodes
+        ])
+        
+        summary_prompt = f"""
+        Based on the user's query: "{query}"
+        
+        Here are the most relevant findings from the knowledge graph:
+        {nodes_text}
+        
+        Please provide a comprehensive summary that:
+        1. Directly answers the user's query
+        2. Highlights the key findings and connections
+        3. Provides actionable insights where applicable
+        4. Is written in a clear, professional tone
+        
+        Summary:
+        """
+        
+        return summary_prompt
+    
     async def generate_insights(self, query: str, visible_nodes: List[Dict], full_graph: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate comprehensive AI insights based on query and knowledge graph data
@@ -239,54 +469,20 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
         try:
             logger.info(f"🧠 Generating AI insights for query: {query}")
             
+            # Nothing visible to analyze; answer locally instead of calling Gemini
+            if not visible_nodes:
+                return self._generate_fallback_insights(query, visible_nodes, full_graph)
+            
             if not self.model:
                 raise Exception("Gemini client not initialized")
             
-            # Prepare data for analysis
-            all_nodes = full_graph.get("nodes", [])
-            all_edges = full_graph.get("edges", [])
-            
-            # Create comprehensive analysis prompt
-            insights_prompt = f"""
-            You are an AI analyst examining a knowledge graph to provide deep insights.
-            
-            USER QUERY: "{query}"
-            
-            KNOWLEDGE GRAPH OVERVIEW:
-            - Total Nodes: {len(all_nodes)}
-            - Total Connections: {len(all_edges)}
-            - Currently Visible Nodes: {len(visible_nodes)}
-            
-            VISIBLE NODES ANALYSIS:
-            {self._format_nodes_for_analysis(visible_nodes)}
-            
-            GRAPH STRUCTURE INSIGHTS:
-            {self._analyze_graph_structure(all_nodes, all_edges)}
-            
-            Please provide a comprehensive analysis that includes:
-            
-            1. **Key Findings**: What are the most important discoveries related to the query?
-            2. **Relationship Patterns**: What interesting connections and patterns emerge?
-            3. **Knowledge Gaps**: What information might be missing or needs further exploration?
-            4. **Strategic Insights**: What actionable recommendations can you provide?
-            5. **Data Quality**: How comprehensive and reliable is the current knowledge base?
-            6. **Future Exploration**: What areas should be investigated next?
-            
-            Format your response as a structured JSON with the following keys:
-            - summary: Brief overview of key findings
-            - key_findings: List of important discoveries
-            - relationship_patterns: Analysis of connections and patterns
-            - knowledge_gaps: Identified gaps or missing information
-            - strategic_insights: Actionable recommendations
-            - data_quality_assessment: Evaluation of data completeness
-            - suggested_next_steps: Recommended follow-up actions
-            - confidence_score: Your confidence in the analysis (0-100)
-            """
-            
-            response = self.model.generate_content(insights_prompt)
-            
-            # Parse and structure the response
-            insights = self._parse_insights_response(response.text, query, visible_nodes, all_nodes)
+            # The cached model output is shared by every caller (and paraphrased queries), so each
+            # request gets its own copy stamped with its own query and time
+            insights = copy.deepcopy(await self._analyze(query, visible_nodes, full_graph))
+            insights['query'] = query
+            insights['analysis_timestamp'] = datetime.now(timezone.utc).isoformat()
+            insights['nodes_analyzed'] = len(visible_nodes)
+            insights['total_nodes'] = len(full_graph.get("nodes", []))
             
             logger.info(f"✅ Generated comprehensive insights for query: {query}")
             return insights
@@ -296,6 +492,59 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
             # Return fallback insights
             return self._generate_fallback_insights(query, visible_nodes, full_graph)
     
+    @semantic_cached(lambda visible_nodes, full_graph: {
+        "visible_node_ids": _node_ids(visible_nodes),
+        "node_ids": _node_ids(full_graph.get("nodes", [])),
+        "edge_count": len(full_graph.get("edges", []))
+    })
+    async def _analyze(self, query: str, visible_nodes: List[Dict], full_graph: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask Gemini for structured insights (model output only, no request metadata); raises if the reply cannot be parsed"""
+        # Prepare data for analysis
+        all_nodes = full_graph.get("nodes", [])
+        all_edges = full_graph.get("edges", [])
+        
+        # Create comprehensive analysis prompt
+        insights_prompt = f"""
+        You are an AI analyst examining a knowledge graph to provide deep insights.
+        
+        USER QUERY: "{query}"
+        
+        KNOWLEDGE GRAPH OVERVIEW:
+        - Total Nodes: {len(all_nodes)}
+        - Total Connections: {len(all_edges)}
+        - Currently Visible Nodes: {len(visible_nodes)}
+        
+        VISIBLE NODES ANALYSIS:
+        {self._format_nodes_for_analysis(visible_nodes)}
+        
+        GRAPH STRUCTURE INSIGHTS:
+        {self._analyze_graph_structure(all_nodes, all_edges)}
+        
+        Please provide a comprehensive analysis that includes:
+        
+        1. **Key Findings**: What are the most important discoveries related to the query?
+        2. **Relationship Patterns**: What interesting connections and patterns emerge?
+        3. **Knowledge Gaps**: What information might be missing or needs further exploration?
+        4. **Strategic Insights**: What actionable recommendations can you provide?
+        5. **Data Quality**: How comprehensive and reliable is the current knowledge base?
+        6. **Future Exploration**: What areas should be investigated next?
+        
+        Format your response as a structured JSON with the following keys:
+        - summary: Brief overview of key findings
+        - key_findings: List of important discoveries
+        - relationship_patterns: Analysis of connections and patterns
+        - knowledge_gaps: Identified gaps or missing information
+        - strategic_insights: Actionable recommendations
+        - data_quality_assessment: Evaluation of data completeness
+        - suggested_next_steps: Recommended follow-up actions
+        - confidence_score: Your confidence in the analysis (0-100)
+        """
+        
+        response = await self._generate(insights_prompt, generation_config=INSIGHTS_GENERATION_CONFIG)
+        
+        # Parse and structure the response
+        return self._parse_insights_response(response.text)
+    
     def _format_nodes_for_analysis(self, nodes: List[Dict]) -> str:
         """Format nodes for AI analysis"""
         if not nodes:
@@ -316,84 +565,42 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
             return "No graph structure to analyze"
         
         # Count node types
-        node_types = {}
-        for node in nodes:
-            node_type = node.get('type', 'unknown')
-            node_types[node_type] = node_types.get(node_type, 0) + 1
+        node_types = Counter(node.get('type', 'unknown') for node in nodes)
         
         # Analyze connectivity
-        node_connections = {}
-        for edge in edges:
-            source = edge.get('source', '')
-            target = edge.get('target', '')
-            node_connections[source] = node_connections.get(source, 0) + 1
-            node_connections[target] = node_connections.get(target, 0) + 1
+        node_connections = Counter(edge.get('source', '') for edge in edges)
+        node_connections.update(edge.get('target', '') for edge in edges)
         
         avg_connections = sum(node_connections.values()) / len(node_connections) if node_connections else 0
         
         analysis = f"""
         Node Type Distribution: {dict(list(node_types.items())[:5])}
         Average Connections per Node: {avg_connections:.1f}
-        Most Connected Nodes: {sorted(node_connections.items(), key=lambda x: x[1], reverse=True)[:3]}
+        Most Connected Nodes: {node_connections.most_common(3)}
         """
         
         return analysis
     
-    def _parse_insights_response(self, response_text: str, query: str, visible_nodes: List[Dict], all_nodes: List[Dict]) -> Dict[str, Any]:
+    def _parse_insights_response(self, response_text: str) -> Dict[str, Any]:
         """Parse and structure the insights response"""
-        try:
-            # Try to extract JSON from response
-            import json
-            import re
-            
-            # Look for JSON in the response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                insights_data = json.loads(json_match.group())
-            else:
-                # Fallback to structured parsing
-                insights_data = self._extract_structured_insights(response_text)
-            
-            # Ensure all required fields are present
-            required_fields = [
-                'summary', 'key_findings', 'relationship_patterns', 
-                'knowledge_gaps', 'strategic_insights', 'data_quality_assessment',
-                'suggested_next_steps', 'confidence_score'
-            ]
-            
-            for field in required_fields:
-                if field not in insights_data:
-                    insights_data[field] = f"Analysis for {field} not available"
-            
-            # Add metadata
-            from datetime import datetime
-            insights_data['query'] = query
-            insights_data['analysis_timestamp'] = datetime.now().isoformat()
-            insights_data['nodes_analyzed'] = len(visible_nodes)
-            insights_data['total_nodes'] = len(all_nodes)
-            
-            return insights_data
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to parse insights response: {e}")
-            return self._generate_fallback_insights(query, visible_nodes, {'nodes': all_nodes})
-    
-    def _extract_structured_insights(self, text: str) -> Dict[str, Any]:
-        """Extract structured insights from free-form text"""
-        return {
-            'summary': text[:200] + "..." if len(text) > 200 else text,
-            'key_findings': ["Analysis based on available data"],
-            'relationship_patterns': "Patterns identified in the knowledge graph",
-            'knowledge_gaps': "Areas requiring additional data",
-            'strategic_insights': "Recommendations based on current analysis",
-            'data_quality_assessment': "Data quality evaluation",
-            'suggested_next_steps': ["Continue data collection", "Refine analysis"],
-            'confidence_score': 75
-        }
+        # The reply is schema-constrained JSON (INSIGHTS_GENERATION_CONFIG)
+        insights_data = orjson.loads(response_text)
+        
+        # Ensure all required fields are present
+        required_fields = [
+            'summary', 'key_findings', 'relationship_patterns', 
+            'knowledge_gaps', 'strategic_insights', 'data_quality_assessment',
+            'suggested_next_steps', 'confidence_score'
+        ]
+        
+        for field in required_fields:
+            if field not in insights_data:
+                insights_data[field] = f"Analysis for {field} not available"
+        
+        return insights_data
     
     def _generate_fallback_insights(self, query: str, visible_nodes: List[Dict], full_graph: Dict[str, Any]) -> Dict[str, Any]:
         """Generate fallback insights when AI analysis fails"""
-        from datetime import datetime
         return {
             'summary': f"Analysis of {len(visible_nodes)} nodes related to '{query}'",
             'key_findings': [
@@ -412,7 +619,7 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
             ],
             'confidence_score': 60,
             'query': query,
-            'analysis_timestamp': datetime.now().isoformat(),
+            'analysis_timestamp': datetime.now(timezone.utc).isoformat(),
             'nodes_analyzed': len(visible_nodes),
             'total_nodes': len(full_graph.get('nodes', []))
         }
@@ -423,13 +630,17 @@ Please return the top {limit} most relevant nodes, ranked by relevance score (0.
             if not self.model:
                 return "not_initialized"
             
-            # Test with a simple query
-            test_response = self.model.generate_content("Hello, are you working?")
-            if test_response and test_response.text:
-                return "healthy"
-            else:
-                return "unhealthy"
+            checked_at, status = self._last_health
+            if time.monotonic() - checked_at < self.health_ttl_seconds:
+                return status
+            
+            # Fetch the model's metadata rather than generating content: no tokens, one small request
+            model_info = await asyncio.to_thread(genai.get_model, self.model.model_name)
+            status = "healthy" if model_info else "unhealthy"
                 
         except Exception as e:
             logger.error(f"❌ Gemini health check failed: {e}")
-            return "error"
\ No newline at end of file
+            status = "error"
+        
+        self._last_health = (time.monotonic(), status)
+        return status
\ No newline at end of file
@@ -4,599 +4,1073 @@ Handles vector storage and retrieval for the knowledge base
 """
 
 import os
-import json
+import sys
+import asyncio
+import hashlib
+import functools
+import itertools
+import threading
+import time
+import uuid
 import logging
-from typing import List, Dict, Any, Optional
-import weaviate
-from weaviate import WeaviateClient as WeaviateClientV4
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+import orjson
+from utils.embed import attach_vectors, get_embedder
+from utils.graph import GraphBuilder
 from utils.logger import setup_logger
+from utils.semantic_cache import SemanticCache
+
+# The weaviate package (gRPC stubs, pydantic models) is imported only on real-client paths,
+# so processes serving the sample graph never pay for it
+if TYPE_CHECKING:
+    from weaviate import WeaviateClient as WeaviateClientV4
 
 logger = setup_logger(__name__)
 
+# Process-wide HTTP/2 pool for Weaviate REST calls made outside the v4 client, currently the
+# readiness probe behind /health; document reads and writes go over the v4 client's gRPC channel
+HTTP_POOL_MAX_CONNECTIONS = 8
+HTTP_POOL_MAX_KEEPALIVE = 4
+
+# Session pool and timeouts (seconds) for the v4 client, sized so concurrent batch
+# ingest and query fan-out don't queue behind the library's default pool
+WEAVIATE_POOL_CONNECTIONS = 64
+WEAVIATE_POOL_MAXSIZE = 128
+WEAVIATE_POOL_MAX_RETRIES = 3
+WEAVIATE_TIMEOUT_INIT = 30
+WEAVIATE_TIMEOUT_QUERY = 60
+WEAVIATE_TIMEOUT_INSERT = 120
+
+# Batch import settings: objects are flushed in one request per batch instead of one per document
+BATCH_SIZE = 100
+BATCH_NUM_WORKERS = 4
+INGEST_CONCURRENCY = 8  # batches in flight at once in store_documents_concurrent
+
+# store_document calls are buffered and flushed as one batch every N items or T ms
+WRITE_BUFFER_MAX_ITEMS = 100
+WRITE_BUFFER_FLUSH_MS = 50
+
+# Graph reads fetch only rendered fields, paged with a cursor
+CONTENT_PREVIEW_CHARS = 100  # what the graph view has always displayed
+GRAPH_PAGE_SIZE = 500
+# Built graphs are reused until a write through this client or this many seconds pass (other writers)
+GRAPH_CACHE_TTL_SECONDS = float(os.getenv("WEAVIATE_GRAPH_CACHE_TTL_SECONDS", "300"))
+GRAPH_DOCUMENT_FIELDS = ["content_preview", "filename", "document_type", "entities"]
+QUERY_DOCUMENT_FIELDS = ["content", "filename", "document_type", "entities", "s3_uri"]
+
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+# Searches in flight at once for query_documents_batch
+QUERY_BATCH_CONCURRENCY = 8
+
+_http_pool: Optional[httpx.AsyncClient] = None
+
+def _get_http_pool(base_url: str, api_key: Optional[str]) -> httpx.AsyncClient:
+    """Return the shared Weaviate HTTP pool, creating it on first use"""
+    global _http_pool
+    if _http_pool is None or _http_pool.is_closed:
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
+        _http_pool = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE
+            )
+        )
+    return _http_pool
+
+_shared_client: Optional["WeaviateClient"] = None
+_shared_client_lock = asyncio.Lock()
+
+async def get_weaviate_client() -> "WeaviateClient":
+    """Return the process-wide WeaviateClient, connecting it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        async with _shared_client_lock:
+            if _shared_client is None:
+                client = WeaviateClient()
+                await client.initialize()
+                _shared_client = client
+    return _shared_client
+
+# Immutable pieces shared by every node of the cached sample graph
+SAMPLE_DEPARTMENT_TERMS = ("department", "enterprise", "operations")
+SAMPLE_ENTITY_TERMS = ("concept", "enterprise")
+SAMPLE_DOCUMENT_TYPES = frozenset(["policy", "procedure", "technical", "strategy", "framework", "program", "manual", "guidelines", "analysis"])
+SAMPLE_SYSTEM_TYPES = frozenset(["system", "platform", "infrastructure", "process", "framework", "compliance", "governance", "metrics", "analytics", "integration", "innovation", "research"])
+SAMPLE_SUPPORT_TYPES = frozenset(["system", "platform", "infrastructure"])
+
+# Sample graph data: core enterprise departments and their documents
+SAMPLE_DEPARTMENTS = (
+    {
+        "name": "Human Resources", "color": "#FF6B6B",
+        "documents": [
+            {"name": "Employee Handbook 2024", "type": "policy", "summary": "Comprehensive guide covering employee policies, benefits, code of conduct, and workplace procedures", "key_terms": ["employee", "benefits", "policy", "conduct", "workplace", "handbook", "procedures"]},
+            {"name": "Diversity & Inclusion Policy", "type": "policy", "summary": "Framework for promoting diversity, equity, and inclusion across all organizational levels", "key_terms": ["diversity", "inclusion", "equity", "discrimination", "workplace", "framework", "organizational"]},
+            {"name": "Remote Work Guidelines", "type": "procedure", "summary": "Detailed procedures for remote work arrangements, equipment, and productivity standards", "key_terms": ["remote", "work", "equipment", "productivity", "guidelines", "arrangements", "standards"]},
+            {"name": "Performance Review Process", "type": "procedure", "summary": "Annual performance evaluation methodology, criteria, and improvement planning", "key_terms": ["performance", "review", "evaluation", "improvement", "criteria", "annual", "methodology"]},
+            {"name": "Compensation Structure", "type": "policy", "summary": "Salary bands, bonus structures, and equity compensation frameworks", "key_terms": ["salary", "compensation", "bonus", "equity", "benefits", "structure", "framework"]},
+            {"name": "Training & Development Program", "type": "program", "summary": "Comprehensive learning and development initiatives for skill enhancement", "key_terms": ["training", "development", "learning", "skills", "enhancement", "program", "initiatives"]},
+            {"name": "Employee Wellness Initiative", "type": "program", "summary": "Health and wellness programs promoting work-life balance", "key_terms": ["wellness", "health", "work-life", "balance", "employee", "program", "initiative"]},
+            {"name": "Recruitment Strategy", "type": "strategy", "summary": "Talent acquisition and recruitment process optimization", "key_terms": ["recruitment", "talent", "acquisition", "hiring", "strategy", "process", "optimization"]}
+        ]
+    },
+    {
+        "name": "Information Technology", "color": "#4ECDC4",
+        "documents": [
+            {"name": "Cybersecurity Framework", "type": "policy", "summary": "Comprehensive security protocols, threat detection, and incident response procedures", "key_terms": ["cybersecurity", "threats", "incident", "response", "protocols", "security", "detection"]},
+            {"name": "Data Governance Policy", "type": "policy", "summary": "Data classification, retention, privacy, and compliance management guidelines", "key_terms": ["data", "governance", "privacy", "compliance", "retention", "classification", "management"]},
+            {"name": "Cloud Infrastructure Guide", "type": "technical", "summary": "AWS cloud architecture, deployment strategies, and cost optimization practices", "key_terms": ["cloud", "aws", "infrastructure", "deployment", "optimization", "architecture", "strategies"]},
+            {"name": "Software Development Standards", "type": "procedure", "summary": "Coding standards, testing protocols, and deployment pipeline requirements", "key_terms": ["development", "coding", "testing", "deployment", "standards", "pipeline", "protocols"]},
+            {"name": "IT Asset Management", "type": "procedure", "summary": "Hardware and software inventory, lifecycle management, and procurement processes", "key_terms": ["assets", "inventory", "lifecycle", "procurement", "management", "hardware", "software"]},
+            {"name": "DevOps Methodology", "type": "framework", "summary": "Continuous integration and deployment practices", "key_terms": ["devops", "continuous", "integration", "deployment", "automation", "methodology", "practices"]},
+            {"name": "API Documentation Standards", "type": "technical", "summary": "REST API design patterns and documentation requirements", "key_terms": ["api", "rest", "documentation", "design", "patterns", "standards", "requirements"]},
+            {"name": "Database Management Procedures", "type": "procedure", "summary": "Database optimization, backup, and recovery protocols", "key_terms": ["database", "optimization", "backup", "recovery", "procedures", "management", "protocols"]}
+        ]
+    },
+    {
+        "name": "Finance", "color": "#45B7D1",
+        "documents": [
+            {"name": "Financial Reporting Standards", "type": "policy", "summary": "GAAP compliance, quarterly reporting, and audit preparation procedures", "key_terms": ["financial", "reporting", "gaap", "audit", "compliance", "quarterly", "standards"]},
+            {"name": "Budget Planning Process", "type": "procedure", "summary": "Annual budget creation, departmental allocations, and variance analysis", "key_terms": ["budget", "planning", "allocation", "variance", "analysis", "annual", "departmental"]},
+            {"name": "Expense Management Policy", "type": "policy", "summary": "Travel expenses, procurement approvals, and reimbursement procedures", "key_terms": ["expense", "travel", "procurement", "approval", "reimbursement", "management", "procedures"]},
+            {"name": "Risk Management Framework", "type": "policy", "summary": "Financial risk assessment, mitigation strategies, and monitoring protocols", "key_terms": ["risk", "assessment", "mitigation", "monitoring", "financial", "framework", "strategies"]},
+            {"name": "Vendor Payment Procedures", "type": "procedure", "summary": "Invoice processing, payment terms, and vendor relationship management", "key_terms": ["vendor", "payment", "invoice", "terms", "relationship", "processing", "procedures"]},
+            {"name": "Investment Policy", "type": "policy", "summary": "Corporate investment guidelines and portfolio management", "key_terms": ["investment", "portfolio", "corporate", "guidelines", "management", "policy", "financial"]},
+            {"name": "Tax Compliance Manual", "type": "manual", "summary": "Tax obligations, filing procedures, and compliance requirements", "key_terms": ["tax", "compliance", "filing", "obligations", "requirements", "manual", "procedures"]},
+            {"name": "Financial Controls Framework", "type": "framework", "summary": "Internal controls and financial oversight mechanisms", "key_terms": ["controls", "oversight", "internal", "financial", "framework", "mechanisms", "governance"]}
+        ]
+    },
+    {
+        "name": "Legal & Compliance", "color": "#96CEB4",
+        "documents": [
+            {"name": "GDPR Compliance Manual", "type": "policy", "summary": "European data protection regulations, consent management, and breach procedures", "key_terms": ["gdpr", "data protection", "consent", "breach", "privacy", "european", "regulations"]},
+            {"name": "Contract Management System", "type": "procedure", "summary": "Contract lifecycle, approval workflows, and legal review processes", "key_terms": ["contract", "lifecycle", "approval", "legal", "review", "workflows", "management"]},
+            {"name": "Intellectual Property Policy", "type": "policy", "summary": "Patent protection, trademark management, and trade secret protocols", "key_terms": ["intellectual property", "patent", "trademark", "trade secret", "protection", "management", "protocols"]},
+            {"name": "Regulatory Compliance Framework", "type": "policy", "summary": "Industry regulations, compliance monitoring, and reporting requirements", "key_terms": ["regulatory", "compliance", "monitoring", "reporting", "requirements", "industry", "framework"]},
+            {"name": "Ethics and Conduct Code", "type": "policy", "summary": "Ethical guidelines, conflict of interest, and whistleblower procedures", "key_terms": ["ethics", "conduct", "conflict", "whistleblower", "guidelines", "ethical", "procedures"]},
+            {"name": "Litigation Management", "type": "procedure", "summary": "Legal dispute resolution and litigation handling processes", "key_terms": ["litigation", "dispute", "resolution", "legal", "management", "processes", "handling"]},
+            {"name": "Corporate Governance Policy", "type": "policy", "summary": "Board oversight, executive accountability, and governance structures", "key_terms": ["governance", "board", "oversight", "accountability", "corporate", "structures", "executive"]},
+            {"name": "Privacy Impact Assessment", "type": "framework", "summary": "Privacy risk evaluation and mitigation procedures", "key_terms": ["privacy", "impact", "assessment", "risk", "evaluation", "mitigation", "procedures"]}
+        ]
+    },
+    {
+        "name": "Operations", "color": "#FECA57",
+        "documents": [
+            {"name": "Quality Management System", "type": "procedure", "summary": "ISO 9001 compliance, quality control processes, and continuous improvement", "key_terms": ["quality", "iso", "control", "improvement", "management", "continuous", "compliance"]},
+            {"name": "Supply Chain Management", "type": "procedure", "summary": "Supplier selection, logistics coordination, and inventory optimization", "key_terms": ["supply chain", "supplier", "logistics", "inventory", "optimization", "coordination", "selection"]},
+            {"name": "Business Continuity Plan", "type": "policy", "summary": "Disaster recovery, emergency procedures, and operational resilience", "key_terms": ["continuity", "disaster", "recovery", "emergency", "resilience", "operational", "procedures"]},
+            {"name": "Customer Service Standards", "type": "procedure", "summary": "Service level agreements, customer satisfaction metrics, and escalation procedures", "key_terms": ["customer service", "sla", "satisfaction", "escalation", "standards", "metrics", "agreements"]},
+            {"name": "Facility Management Guidelines", "type": "procedure", "summary": "Office space management, maintenance schedules, and safety protocols", "key_terms": ["facility", "office", "maintenance", "safety", "management", "schedules", "protocols"]},
+            {"name": "Process Optimization Framework", "type": "framework", "summary": "Lean methodology and process improvement initiatives", "key_terms": ["process", "optimization", "lean", "methodology", "improvement", "framework", "initiatives"]},
+            {"name": "Vendor Management Program", "type": "program", "summary": "Vendor evaluation, performance monitoring, and relationship management", "key_terms": ["vendor", "evaluation", "performance", "monitoring", "relationship", "management", "program"]},
+            {"name": "Environmental Sustainability Policy", "type": "policy", "summary": "Green initiatives, carbon footprint reduction, and sustainability goals", "key_terms": ["environmental", "sustainability", "green", "carbon", "footprint", "reduction", "initiatives"]}
+        ]
+    },
+    {
+        "name": "Marketing", "color": "#FF9FF3",
+        "documents": [
+            {"name": "Brand Guidelines", "type": "policy", "summary": "Brand identity, visual standards, and messaging consistency requirements", "key_terms": ["brand", "identity", "visual", "messaging", "consistency", "guidelines", "standards"]},
+            {"name": "Digital Marketing Strategy", "type": "strategy", "summary": "SEO optimization, social media campaigns, and content marketing frameworks", "key_terms": ["digital", "marketing", "seo", "social media", "content", "optimization", "campaigns"]},
+            {"name": "Customer Data Privacy", "type": "policy", "summary": "Marketing data collection, consent management, and privacy compliance", "key_terms": ["customer data", "privacy", "consent", "collection", "compliance", "marketing", "management"]},
+            {"name": "Campaign Management Process", "type": "procedure", "summary": "Campaign planning, execution, measurement, and optimization procedures", "key_terms": ["campaign", "planning", "execution", "measurement", "optimization", "management", "procedures"]},
+            {"name": "Public Relations Guidelines", "type": "procedure", "summary": "Media relations, crisis communication, and public statement protocols", "key_terms": ["public relations", "media", "crisis", "communication", "protocols", "guidelines", "statements"]},
+            {"name": "Market Research Framework", "type": "framework", "summary": "Customer insights, market analysis, and competitive intelligence", "key_terms": ["market research", "insights", "analysis", "competitive", "intelligence", "customer", "framework"]},
+            {"name": "Content Strategy", "type": "strategy", "summary": "Content creation, distribution, and engagement optimization", "key_terms": ["content", "creation", "distribution", "engagement", "optimization", "strategy", "marketing"]},
+            {"name": "Lead Generation Process", "type": "procedure", "summary": "Lead qualification, nurturing, and conversion optimization", "key_terms": ["lead", "generation", "qualification", "nurturing", "conversion", "optimization", "process"]}
+        ]
+    },
+    {
+        "name": "Sales", "color": "#54A0FF",
+        "documents": [
+            {"name": "Sales Methodology", "type": "framework", "summary": "Sales process, qualification criteria, and closing techniques", "key_terms": ["sales", "methodology", "process", "qualification", "closing", "techniques", "framework"]},
+            {"name": "Customer Relationship Management", "type": "procedure", "summary": "CRM usage, customer data management, and relationship building", "key_terms": ["crm", "customer", "relationship", "data", "management", "building", "procedures"]},
+            {"name": "Territory Management", "type": "strategy", "summary": "Sales territory allocation, coverage optimization, and performance tracking", "key_terms": ["territory", "allocation", "coverage", "optimization", "performance", "tracking", "sales"]},
+            {"name": "Pricing Strategy", "type": "strategy", "summary": "Pricing models, discount policies, and competitive positioning", "key_terms": ["pricing", "models", "discount", "policies", "competitive", "positioning", "strategy"]},
+            {"name": "Sales Training Program", "type": "program", "summary": "Sales skills development, product training, and certification", "key_terms": ["sales training", "skills", "development", "product", "certification", "program", "learning"]},
+            {"name": "Channel Partner Management", "type": "procedure", "summary": "Partner onboarding, enablement, and performance management", "key_terms": ["channel", "partner", "onboarding", "enablement", "performance", "management", "procedures"]},
+            {"name": "Sales Forecasting", "type": "procedure", "summary": "Revenue prediction, pipeline analysis, and forecast accuracy", "key_terms": ["forecasting", "revenue", "prediction", "pipeline", "analysis", "accuracy", "sales"]},
+            {"name": "Customer Success Framework", "type": "framework", "summary": "Customer onboarding, retention, and expansion strategies", "key_terms": ["customer success", "onboarding", "retention", "expansion", "strategies", "framework", "satisfaction"]}
+        ]
+    },
+    {
+        "name": "Product Management", "color": "#5F27CD",
+        "documents": [
+            {"name": "Product Roadmap", "type": "strategy", "summary": "Product vision, feature prioritization, and release planning", "key_terms": ["product", "roadmap", "vision", "prioritization", "release", "planning", "features"]},
+            {"name": "User Experience Guidelines", "type": "guidelines", "summary": "UX design principles, usability standards, and user research", "key_terms": ["ux", "design", "usability", "user research", "principles", "standards", "experience"]},
+            {"name": "Product Requirements Document", "type": "technical", "summary": "Feature specifications, acceptance criteria, and technical requirements", "key_terms": ["requirements", "specifications", "acceptance", "criteria", "technical", "features", "product"]},
+            {"name": "Agile Development Process", "type": "framework", "summary": "Scrum methodology, sprint planning, and iterative development", "key_terms": ["agile", "scrum", "sprint", "planning", "iterative", "development", "methodology"]},
+            {"name": "Product Analytics Framework", "type": "framework", "summary": "Metrics tracking, user behavior analysis, and performance monitoring", "key_terms": ["analytics", "metrics", "tracking", "behavior", "analysis", "performance", "monitoring"]},
+            {"name": "Go-to-Market Strategy", "type": "strategy", "summary": "Product launch, market positioning, and customer acquisition", "key_terms": ["go-to-market", "launch", "positioning", "acquisition", "customer", "strategy", "market"]},
+            {"name": "Competitive Analysis", "type": "analysis", "summary": "Market research, competitor evaluation, and positioning strategy", "key_terms": ["competitive", "analysis", "market research", "competitor", "evaluation", "positioning", "strategy"]},
+            {"name": "Product Lifecycle Management", "type": "framework", "summary": "Product development stages, lifecycle optimization, and end-of-life planning", "key_terms": ["lifecycle", "development", "stages", "optimization", "end-of-life", "planning", "product"]}
+        ]
+    }
+)
+
+# Cross-departmental connections as (source, target, label)
+SAMPLE_CROSS_CONNECTIONS = (
+    ("dept_human_resources", "dept_legal_and_compliance", "collaborates"),
+    ("dept_information_technology", "dept_finance", "supports"),
+    ("dept_operations", "dept_marketing", "coordinates"),
+    ("dept_legal_and_compliance", "dept_finance", "oversees"),
+    ("dept_information_technology", "dept_operations", "enables"),
+    ("dept_marketing", "dept_human_resources", "partners"),
+    ("dept_sales", "dept_marketing", "collaborates"),
+    ("dept_product_management", "dept_sales", "supports"),
+    ("dept_product_management", "dept_marketing", "coordinates"),
+    ("dept_information_technology", "dept_product_management", "develops"),
+    ("dept_operations", "dept_sales", "fulfills"),
+    ("dept_finance", "dept_sales", "tracks"),
+    ("dept_human_resources", "dept_product_management", "staffs"),
+    ("dept_legal_and_compliance", "dept_product_management", "reviews"),
+    ("dept_operations", "dept_finance", "reports_to"),
+    ("dept_marketing", "dept_finance", "budgets_with"),
+    ("dept_sales", "dept_finance", "forecasts_with"),
+    ("dept_information_technology", "dept_legal_and_compliance", "secures_for"),
+    ("dept_human_resources", "dept_operations", "trains_for"),
+    ("dept_product_management", "dept_operations", "delivers_through")
+)
+
+# System and process nodes, each linked to the departments it connects to
+SAMPLE_SYSTEMS_AND_PROCESSES = (
+    # Core Systems
+    {"id": "system_erp", "label": "ERP System", "type": "system", "summary": "Enterprise Resource Planning system integrating business processes", "key_terms": ["erp", "integration", "business process", "automation", "enterprise"], "connects_to": ["dept_finance", "dept_operations", "dept_human_resources"]},
+    {"id": "system_crm", "label": "CRM Platform", "type": "system", "summary": "Customer Relationship Management platform", "key_terms": ["crm", "customer", "sales", "service", "relationship"], "connects_to": ["dept_sales", "dept_marketing", "dept_operations"]},
+    {"id": "system_hrms", "label": "HRMS", "type": "system", "summary": "Human Resource Management System", "key_terms": ["hrms", "human resources", "employee", "management", "payroll"], "connects_to": ["dept_human_resources", "dept_finance"]},
+    {"id": "system_bi", "label": "Business Intelligence", "type": "system", "summary": "Data analytics and reporting platform", "key_terms": ["business intelligence", "analytics", "reporting", "data", "insights"], "connects_to": ["dept_finance", "dept_marketing", "dept_sales", "dept_operations"]},
+    {"id": "system_cms", "label": "Content Management", "type": "system", "summary": "Content creation and management platform", "key_terms": ["cms", "content", "management", "publishing", "digital"], "connects_to": ["dept_marketing", "dept_product_management"]},
+    
+    # Infrastructure
+    {"id": "infra_cloud", "label": "Cloud Infrastructure", "type": "infrastructure", "summary": "AWS cloud computing infrastructure", "key_terms": ["cloud", "aws", "infrastructure", "computing", "scalability"], "connects_to": ["dept_information_technology", "dept_operations"]},
+    {"id": "infra_network", "label": "Network Infrastructure", "type": "infrastructure", "summary": "Corporate network and connectivity", "key_terms": ["network", "connectivity", "infrastructure", "security", "bandwidth"], "connects_to": ["dept_information_technology", "dept_operations"]},
+    {"id": "infra_security", "label": "Security Infrastructure", "type": "infrastructure", "summary": "Cybersecurity and data protection systems", "key_terms": ["security", "cybersecurity", "protection", "firewall", "encryption"], "connects_to": ["dept_information_technology", "dept_legal_and_compliance"]},
+    
+    # Business Processes
+    {"id": "process_onboarding", "label": "Employee Onboarding", "type": "process", "summary": "New employee integration process", "key_terms": ["onboarding", "employee", "integration", "training", "orientation"], "connects_to": ["dept_human_resources", "dept_information_technology"]},
+    {"id": "process_procurement", "label": "Procurement Process", "type": "process", "summary": "Vendor selection and purchasing workflow", "key_terms": ["procurement", "vendor", "purchasing", "approval", "workflow"], "connects_to": ["dept_finance", "dept_operations", "dept_legal_and_compliance"]},
+    {"id": "process_product_dev", "label": "Product Development", "type": "process", "summary": "Product ideation to launch process", "key_terms": ["product development", "ideation", "launch", "innovation", "lifecycle"], "connects_to": ["dept_product_management", "dept_information_technology", "dept_marketing"]},
+    {"id": "process_customer_support", "label": "Customer Support", "type": "process", "summary": "Customer service and issue resolution", "key_terms": ["customer support", "service", "resolution", "satisfaction", "helpdesk"], "connects_to": ["dept_operations", "dept_sales", "dept_information_technology"]},
+    
+    # Frameworks and Methodologies
+    {"id": "framework_agile", "label": "Agile Framework", "type": "framework", "summary": "Agile development methodology", "key_terms": ["agile", "methodology", "scrum", "development", "iterative"], "connects_to": ["dept_information_technology", "dept_product_management"]},
+    {"id": "framework_lean", "label": "Lean Methodology", "type": "framework", "summary": "Lean process optimization", "key_terms": ["lean", "optimization", "efficiency", "waste", "continuous improvement"], "connects_to": ["dept_operations", "dept_product_management"]},
+    {"id": "framework_devops", "label": "DevOps Framework", "type": "framework", "summary": "Development and operations integration", "key_terms": ["devops", "integration", "automation", "deployment", "collaboration"], "connects_to": ["dept_information_technology", "dept_operations"]},
+    
+    # Compliance and Governance
+    {"id": "compliance_sox", "label": "SOX Compliance", "type": "compliance", "summary": "Sarbanes-Oxley compliance framework", "key_terms": ["sox", "compliance", "financial", "reporting", "controls"], "connects_to": ["dept_finance", "dept_legal_and_compliance"]},
+    {"id": "compliance_iso", "label": "ISO Standards", "type": "compliance", "summary": "International Organization for Standardization compliance", "key_terms": ["iso", "standards", "quality", "management", "certification"], "connects_to": ["dept_operations", "dept_legal_and_compliance"]},
+    {"id": "governance_data", "label": "Data Governance", "type": "governance", "summary": "Data management and privacy governance", "key_terms": ["data governance", "privacy", "management", "quality", "stewardship"], "connects_to": ["dept_information_technology", "dept_legal_and_compliance"]},
+    
+    # Analytics and Metrics
+    {"id": "metrics_kpi", "label": "KPI Dashboard", "type": "metrics", "summary": "Key Performance Indicators tracking", "key_terms": ["kpi", "metrics", "performance", "dashboard", "tracking"], "connects_to": ["dept_finance", "dept_operations", "dept_sales", "dept_marketing"]},
+    {"id": "analytics_customer", "label": "Customer Analytics", "type": "analytics", "summary": "Customer behavior and satisfaction analysis", "key_terms": ["customer analytics", "behavior", "satisfaction", "analysis", "insights"], "connects_to": ["dept_marketing", "dept_sales", "dept_operations"]},
+    {"id": "analytics_financial", "label": "Financial Analytics", "type": "analytics", "summary": "Financial performance and forecasting", "key_terms": ["financial analytics", "performance", "forecasting", "budgeting", "variance"], "connects_to": ["dept_finance", "dept_operations"]},
+    
+    # Communication and Collaboration
+    {"id": "platform_collaboration", "label": "Collaboration Platform", "type": "platform", "summary": "Team communication and collaboration tools", "key_terms": ["collaboration", "communication", "teams", "productivity", "remote"], "connects_to": ["dept_human_resources", "dept_information_technology"]},
+    {"id": "platform_knowledge", "label": "Knowledge Management", "type": "platform", "summary": "Organizational knowledge sharing platform", "key_terms": ["knowledge management", "sharing", "documentation", "wiki", "learning"], "connects_to": ["dept_human_resources", "dept_information_technology", "dept_operations"]},
+    
+    # External Integrations
+    {"id": "integration_banking", "label": "Banking Integration", "type": "integration", "summary": "Financial institution connectivity", "key_terms": ["banking", "integration", "payments", "transactions", "financial"], "connects_to": ["dept_finance", "dept_information_technology"]},
+    {"id": "integration_partners", "label": "Partner Integrations", "type": "integration", "summary": "Third-party partner system connections", "key_terms": ["partners", "integration", "third-party", "api", "connectivity"], "connects_to": ["dept_sales", "dept_operations", "dept_information_technology"]},
+    
+    # Innovation and Research
+    {"id": "innovation_lab", "label": "Innovation Lab", "type": "innovation", "summary": "Research and development initiatives", "key_terms": ["innovation", "research", "development", "experimentation", "emerging"], "connects_to": ["dept_product_management", "dept_information_technology"]},
+    {"id": "research_market", "label": "Market Research", "type": "research", "summary": "Market analysis and competitive intelligence", "key_terms": ["market research", "analysis", "competitive", "intelligence", "trends"], "connects_to": ["dept_marketing", "dept_product_management", "dept_sales"]}
+)
+
+# Cross-system connections as (source, target, label)
+SAMPLE_SYSTEM_CONNECTIONS = (
+    ("system_erp", "system_crm", "integrates_with"),
+    ("system_crm", "system_bi", "feeds_data_to"),
+    ("system_hrms", "system_erp", "synchronizes_with"),
+    ("infra_cloud", "system_erp", "hosts"),
+    ("infra_cloud", "system_crm", "hosts"),
+    ("infra_security", "infra_cloud", "protects"),
+    ("infra_network", "infra_cloud", "connects_to"),
+    ("process_onboarding", "system_hrms", "uses"),
+    ("process_procurement", "system_erp", "managed_by"),
+    ("framework_agile", "process_product_dev", "guides"),
+    ("framework_lean", "process_procurement", "optimizes"),
+    ("compliance_sox", "system_erp", "governs"),
+    ("governance_data", "system_bi", "oversees"),
+    ("metrics_kpi", "system_bi", "displayed_in"),
+    ("analytics_customer", "system_crm", "analyzes_data_from"),
+    ("analytics_financial", "system_erp", "processes_data_from"),
+    ("platform_collaboration", "process_onboarding", "facilitates"),
+    ("platform_knowledge", "framework_agile", "documents"),
+    ("integration_banking", "system_erp", "connects_to"),
+    ("integration_partners", "system_crm", "extends"),
+    ("innovation_lab", "process_product_dev", "influences"),
+    ("research_market", "analytics_customer", "informs")
+)
+
+# Entity-to-entity relationships, kept only when both entities are in the graph
+SAMPLE_ENTITY_RELATIONSHIPS = (
+    ("entity_employee", "entity_training", "requires"),
+    ("entity_security", "entity_compliance", "ensures"),
+    ("entity_data", "entity_privacy", "protected_by"),
+    ("entity_customer", "entity_satisfaction", "measured_by"),
+    ("entity_process", "entity_optimization", "improved_through"),
+    ("entity_technology", "entity_innovation", "drives"),
+    ("entity_financial", "entity_reporting", "documented_in"),
+    ("entity_quality", "entity_management", "maintained_by"),
+    ("entity_risk", "entity_mitigation", "addressed_through"),
+    ("entity_performance", "entity_metrics", "tracked_by"),
+    ("entity_development", "entity_methodology", "follows"),
+    ("entity_integration", "entity_automation", "enables"),
+    ("entity_governance", "entity_oversight", "provides"),
+    ("entity_analysis", "entity_insights", "generates"),
+    ("entity_collaboration", "entity_productivity", "enhances")
+)
+
+def _slug(name: str) -> str:
+    """Id fragment for a sample-graph department or document name"""
+    return name.lower().replace(' ', '_').replace('&', 'and')
+
+def _canonical_term(term: str) -> str:
+    """Case- and whitespace-insensitive form of an entity term, so "Stanford" and "  stanford " share one node"""
+    return " ".join(term.split()).lower()
+
+def _entity_id(term: str) -> str:
+    """Interned sample-graph entity id; each one is referenced by many edges"""
+    return sys.intern(f"entity_{term.replace(' ', '_').replace('&', 'and')}")
+
 class WeaviateClient:
     """Weaviate client for vector storage and retrieval"""
     
     def __init__(self):
-        self.client: Optional[WeaviateClientV4] = None
+        self.client: Optional["WeaviateClientV4"] = None
         self.url = os.getenv("WEAVIATE_URL", "http://localhost:8080")
         self.api_key = os.getenv("WEAVIATE_API_KEY")
+        self.grpc_port = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
+        self._http: Optional[httpx.AsyncClient] = None
+        # Only one batching context is opened on the collection at a time
+        self._batch_lock = threading.Lock()
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._write_flusher: Optional[asyncio.Task] = None
+        self.cache: Optional[SemanticCache] = None
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        # (expires_at, graph) for the last graph built from stored documents; writes bump the generation
+        self._graph: Optional[Tuple[float, GraphBuilder]] = None
+        self._graph_generation = 0
         
     async def initialize(self):
         """Initialize Weaviate client and create schema"""
         try:
             logger.info(f"🔗 Connecting to Weaviate at {self.url}")
             
-            # For now, skip actual Weaviate connection and use mock data
-            logger.info("⚠️ Using mock Weaviate client for testing")
-            self.client = None  # Mock client
+            # Serve repeated and paraphrased queries without a vector search round trip
+            self.cache = SemanticCache(
+                self._embed_query,
+                threshold=float(os.getenv("WEAVIATE_CACHE_THRESHOLD", "0.95")),
+                ttl_seconds=float(os.getenv("WEAVIATE_CACHE_TTL_SECONDS", "300")),
+                max_entries=int(os.getenv("WEAVIATE_CACHE_MAX_ENTRIES", "10000"))
+            )
+            
+            # Load the optional local embedding model now rather than on the first request
+            await asyncio.to_thread(get_embedder)
             
-            logger.info("✅ Weaviate client initialized successfully (mock mode)")
+            if os.getenv("WEAVIATE_MOCK", "1") == "1":
+                # Skip the actual Weaviate connection and use mock data
+                logger.info("⚠️ Using mock Weaviate client for testing")
+                self.client = None  # Mock client
+                logger.info("✅ Weaviate client initialized successfully (mock mode)")
+                return
+            
+            self.client = await asyncio.to_thread(self._connect)
+            self._http = _get_http_pool(self.url, self.api_key)
+            await self._create_schema()
+            
+            logger.info("✅ Weaviate client initialized successfully")
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize Weaviate client: {e}")
             raise
     
+    def _connect(self) -> "WeaviateClientV4":
+        """Open the v4 client: REST for schema/metadata, gRPC for inserts and queries"""
+        import weaviate
+        from weaviate.classes.init import AdditionalConfig, Auth, Timeout
+        from weaviate.config import ConnectionConfig
+        
+        url = urlparse(self.url)
+        secure = url.scheme == "https"
+        return weaviate.connect_to_custom(
+            http_host=url.hostname,
+            http_port=url.port or (443 if secure else 80),
+            http_secure=secure,
+            grpc_host=url.hostname,
+            grpc_port=self.grpc_port,
+            grpc_secure=secure,
+            auth_credentials=Auth.api_key(self.api_key) if self.api_key else None,
+            additional_config=AdditionalConfig(
+                connection=ConnectionConfig(
+                    session_pool_connections=WEAVIATE_POOL_CONNECTIONS,
+                    session_pool_maxsize=WEAVIATE_POOL_MAXSIZE,
+                    session_pool_max_retries=WEAVIATE_POOL_MAX_RETRIES
+                ),
+                timeout=Timeout(
+                    init=WEAVIATE_TIMEOUT_INIT,
+                    query=WEAVIATE_TIMEOUT_QUERY,
+                    insert=WEAVIATE_TIMEOUT_INSERT
+                )
+            )
+        )
+    
     async def _create_schema(self):
         """Create the document schema in Weaviate"""
+        from weaviate.classes.config import Configure, DataType, Property
+        
         try:
-            schema = {
-                "class": "Document",
-                "description": "Enterprise documents for ContextCloud Agents",
-                "vectorizer": "text2vec-transformers",
-                "properties": [
-                    {
-                        "name": "content",
-                        "dataType": ["text"],
-                        "description": "Document content"
-                    },
-                    {
-                        "name": "filename",
-                        "dataType": ["string"],
-                        "description": "Original filename"
-                    },
-                    {
-                        "name": "document_type",
-                        "dataType": ["string"],
-                        "description": "Type of document (policy, manual, report, etc.)"
-                    },
-                    {
-                        "name": "s3_uri",
-                        "dataType": ["string"],
-                        "description": "S3 storage URI"
-                    },
-                    {
-                        "name": "entities",
-                        "dataType": ["text[]"],
-                        "description": "Extracted entities"
-                    },
-                    {
-                        "name": "upload_metadata",
-                        "dataType": ["object"],
-                        "description": "Additional metadata"
-                    },
-                    {
-                        "name": "created_at",
-                        "dataType": ["date"],
-                        "description": "Document creation timestamp"
-                    }
-                ]
-            }
+            properties = [
+                Property(name="content", data_type=DataType.TEXT, description="Document content"),
+                Property(name="content_preview", data_type=DataType.TEXT,
+                         description="First characters of the document content, used by the graph view"),
+                Property(name="filename", data_type=DataType.TEXT, description="Original filename"),
+                Property(name="document_type", data_type=DataType.TEXT,
+                         description="Type of document (policy, manual, report, etc.)"),
+                Property(name="s3_uri", data_type=DataType.TEXT, description="S3 storage URI"),
+                Property(name="entities", data_type=DataType.TEXT_ARRAY, description="Extracted entities"),
+                Property(name="upload_metadata", data_type=DataType.TEXT, description="Additional metadata (JSON)"),
+                Property(name="created_at", data_type=DataType.DATE, description="Document creation timestamp")
+            ]
             
-            # Check if schema exists
-            if self.client.schema.exists("Document"):
+            # Check if schema exists (the client is synchronous, so run it off the event loop)
+            if await asyncio.to_thread(self.client.collections.exists, "Document"):
                 logger.info("📋 Document schema already exists")
             else:
-                self.client.schema.create_class(schema)
+                await asyncio.to_thread(
+                    self.client.collections.create,
+                    "Document",
+                    description="Enterprise documents for ContextCloud Agents",
+                    vectorizer_config=Configure.Vectorizer.text2vec_transformers(),
+                    properties=properties
+                )
                 logger.info("📋 Created Document schema")
                 
         except Exception as e:
             logger.error(f"❌ Failed to create schema: {e}")
             raise
     
-    async def store_document(self, content: str, metadata: Dict[str, Any]) -> str:
-        """Store a document in Weaviate"""
+    def _document_object(self, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Document properties for a piece of content"""
+        return {
+            "content": content,
+            "content_preview": content[:CONTENT_PREVIEW_CHARS],
+            "filename": metadata.get("filename", ""),
+            "document_type": metadata.get("document_type", "general"),
+            "s3_uri": metadata.get("s3_uri", ""),
+            "entities": metadata.get("entities", []),
+            "upload_metadata": metadata.get("upload_metadata", "{}"),
+            "created_at": metadata.get("created_at", "2024-01-01T00:00:00Z")
+        }
+    
+    @staticmethod
+    def _document_id(content: str, metadata: Dict[str, Any]) -> str:
+        """Deterministic object id, so callers know it before insertion and re-uploads overwrite"""
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{metadata.get('filename', 'unnamed')}:{digest}"))
+    
+    async def store_documents(self, docs: List[Tuple[str, Dict[str, Any]]], batch_size: int = BATCH_SIZE,
+                              concurrent_requests: int = BATCH_NUM_WORKERS) -> List[str]:
+        """Store several documents in Weaviate using the batch importer"""
         try:
-            logger.info(f"💾 Storing document: {metadata.get('filename', 'unnamed')}")
-            
-            doc_object = {
-                "content": content,
-                "filename": metadata.get("filename", ""),
-                "document_type": metadata.get("document_type", "general"),
-                "s3_uri": metadata.get("s3_uri", ""),
-                "entities": metadata.get("entities", []),
-                "upload_metadata": metadata.get("upload_metadata", {}),
-                "created_at": metadata.get("created_at", "2024-01-01T00:00:00Z")
-            }
+            started = time.perf_counter()
             
-            result = self.client.data_object.create(
-                data_object=doc_object,
-                class_name="Document"
-            )
-            
-            doc_id = result["id"]
-            logger.info(f"✅ Document stored with ID: {doc_id}")
+            # Precomputed vectors let Weaviate skip the text2vec-transformers pass
+            docs = await asyncio.to_thread(attach_vectors, docs)
+            doc_ids = await asyncio.to_thread(self._write_batch, docs, batch_size, concurrent_requests)
             
-            return doc_id
+            self._invalidate_cache()
+            logger.info("✅ Stored %d documents in %.2fs", len(doc_ids), time.perf_counter() - started)
+            return doc_ids
             
         except Exception as e:
-            logger.error(f"❌ Failed to store document: {e}")
+            logger.error(f"❌ Failed to store documents: {e}")
             raise
     
-    async def query_documents(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Query documents using vector similarity"""
+    async def store_documents_concurrent(self, docs: List[Tuple[str, Dict[str, Any]]], batch_size: int = BATCH_SIZE,
+                                         concurrency: int = INGEST_CONCURRENCY) -> List[str]:
+        """Store many documents as insert_many batches sent concurrently over the gRPC channel"""
         try:
-            logger.info(f"🔍 Querying documents: {query[:50]}...")
+            started = time.perf_counter()
+            logger.debug("💾 Storing %d documents in batches of %d (%d in flight)", len(docs), batch_size, concurrency)
             
-            query_result = (
-                self.client.query
-                .get("Document", ["content", "filename", "document_type", "entities", "s3_uri"])
-                .with_near_text({"concepts": [query]})
-                .with_limit(limit)
-                .with_additional(["certainty", "distance"])
-                .do()
-            )
+            docs = await asyncio.to_thread(attach_vectors, docs)
+            semaphore = asyncio.Semaphore(concurrency)
             
-            documents = []
-            if "data" in query_result and "Get" in query_result["data"]:
-                for doc in query_result["data"]["Get"]["Document"]:
-                    documents.append({
-                        "content": doc.get("content", ""),
-                        "filename": doc.get("filename", ""),
-                        "document_type": doc.get("document_type", ""),
-                        "entities": doc.get("entities", []),
-                        "s3_uri": doc.get("s3_uri", ""),
-                        "certainty": doc.get("_additional", {}).get("certainty", 0),
-                        "distance": doc.get("_additional", {}).get("distance", 0)
-                    })
+            async def _one(chunk: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+                async with semaphore:
+                    return await asyncio.to_thread(self._insert_many, chunk)
             
-            logger.info(f"✅ Found {len(documents)} relevant documents")
-            return documents
+            results = await asyncio.gather(*[
+                _one(docs[start:start + batch_size]) for start in range(0, len(docs), batch_size)
+            ])
+            doc_ids = [doc_id for chunk_ids in results for doc_id in chunk_ids]
+            
+            self._invalidate_cache()
+            logger.info("✅ Stored %d documents in %.2fs", len(doc_ids), time.perf_counter() - started)
+            return doc_ids
             
         except Exception as e:
-            logger.error(f"❌ Failed to query documents: {e}")
+            logger.error(f"❌ Failed to store documents: {e}")
             raise
     
-    async def get_knowledge_graph(self) -> Dict[str, Any]:
-        """Get knowledge graph data for visualization"""
-        try:
-            logger.info("📊 Building knowledge graph")
+    def _insert_many(self, docs: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Insert one batch with a single insert_many call and return the object ids"""
+        from weaviate.classes.data import DataObject
+        
+        objects = [
+            DataObject(
+                properties=self._document_object(content, metadata),
+                uuid=self._document_id(content, metadata),
+                vector=metadata.get("vector")
+            )
+            for content, metadata in docs
+        ]
+        result = self.client.collections.get("Document").data.insert_many(objects)
+        if result.has_errors:
+            first_error = next(iter(result.errors.values()))
+            raise Exception(f"Batch import failed for {len(result.errors)} objects: {first_error.message}")
+        
+        return [obj.uuid for obj in objects]
+    
+    def _invalidate_cache(self):
+        """New documents can change any search result or the graph, so cached results are dropped"""
+        if self.cache is not None:
+            self.cache.clear()
+        self._graph = None
+        self._graph_generation += 1
+    
+    def _write_batch(self, docs: List[Tuple[str, Dict[str, Any]]], batch_size: int, concurrent_requests: int) -> List[str]:
+        """Blocking batch write, run in a worker thread"""
+        with self._batch_lock:
+            collection = self.client.collections.get("Document")
             
-            # In mock mode, always use sample data
-            if self.client is None:
-                logger.info("🎭 Using sample knowledge graph data (mock mode)")
-                return self._generate_comprehensive_sample_graph()
+            doc_ids = []
+            with collection.batch.fixed_size(batch_size=batch_size, concurrent_requests=concurrent_requests) as batch:
+                for content, metadata in docs:
+                    doc_id = self._document_id(content, metadata)
+                    batch.add_object(
+                        properties=self._document_object(content, metadata),
+                        uuid=doc_id,
+                        vector=metadata.get("vector")
+                    )
+                    doc_ids.append(doc_id)
             
-            # Try to get real documents first (when Weaviate is actually connected)
+            failed = collection.batch.failed_objects
+            if failed:
+                raise Exception(f"Batch import failed for {len(failed)} objects: {failed[0].message}")
+            return doc_ids
+    
+    async def store_document(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Store a document in Weaviate, batched with other concurrent store_document calls"""
+        logger.debug("💾 Storing document: %s", metadata.get("filename", "unnamed"))
+        
+        if self._write_flusher is None or self._write_flusher.done():
+            self._write_queue = asyncio.Queue()
+            self._write_flusher = asyncio.create_task(self._flush_writes())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((content, metadata, future))
+        doc_id = await future
+        logger.debug("✅ Document stored with ID: %s", doc_id)
+        
+        return doc_id
+    
+    async def _flush_writes(self):
+        """Background task that drains buffered store_document calls into batch writes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = []
             try:
-                query_result = (
-                    self.client.query
-                    .get("Document", ["content", "filename", "document_type", "entities"])
-                    .with_limit(100)
-                    .do()
-                )
-            except:
-                logger.info("🎭 Falling back to sample knowledge graph data")
-                return self._generate_comprehensive_sample_graph()
-            
-            nodes = []
-            edges = []
+                pending.append(await self._write_queue.get())
+                deadline = loop.time() + WRITE_BUFFER_FLUSH_MS / 1000
+                while len(pending) < WRITE_BUFFER_MAX_ITEMS:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                
+                doc_ids = await self.store_documents([(content, metadata) for content, metadata, _ in pending])
+            except asyncio.CancelledError:
+                # close() cancelled us mid-batch; callers awaiting these writes must not hang
+                self._fail_writes(pending, Exception("Weaviate client closed before the document was stored"))
+                raise
+            except Exception as e:
+                self._fail_writes(pending, e)
+                continue
             
-            # Check if we have real documents
-            has_real_documents = False
-            if "data" in query_result and "Get" in query_result["data"] and query_result["data"]["Get"]["Document"]:
-                has_real_documents = True
-                for i, doc in enumerate(query_result["data"]["Get"]["Document"]):
-                    # Create document node
-                    node = {
-                        "id": f"doc_{i}",
-                        "label": doc.get("filename", f"Document {i}"),
-                        "type": doc.get("document_type", "general"),
-                        "entities": doc.get("entities", []),
-                        "content_preview": doc.get("content", "")[:100] + "...",
-                        "summary": f"Document containing information about {', '.join(doc.get('entities', [])[:3])}",
-                        "key_terms": doc.get("entities", [])[:5]
-                    }
-                    nodes.append(node)
-                    
-                    # Create entity nodes and edges
-                    entities = doc.get("entities", [])
-                    for entity in entities:
-                        entity_node = {
-                            "id": f"entity_{entity}",
-                            "label": entity,
-                            "type": "entity",
-                            "summary": f"Entity extracted from enterprise documents",
-                            "key_terms": [entity.lower()]
-                        }
-                        
-                        if entity_node not in nodes:
-                            nodes.append(entity_node)
-                        
-                        # Create edge between document and entity
-                        edge = {
-                            "source": f"doc_{i}",
-                            "target": f"entity_{entity}",
-                            "label": "contains"
-                        }
-                        edges.append(edge)
+            for (_, _, future), doc_id in zip(pending, doc_ids):
+                if not future.done():
+                    future.set_result(doc_id)
+    
+    @staticmethod
+    def _fail_writes(pending: List[Tuple[str, Dict[str, Any], asyncio.Future]], error: Exception):
+        """Resolve buffered store_document futures that will never be written"""
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+    
+    async def query_documents(self, query: str, limit: int = 10, min_certainty: Optional[float] = None,
+                              max_distance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Query documents using vector similarity, served from the semantic cache when possible"""
+        # Queries with numbers can be near-identical in embedding space yet ask for different things
+        if self.cache is None or any(ch.isdigit() for ch in query):
+            return await self._search_documents(query, limit, min_certainty, max_distance)
+        
+        computed = False
+        
+        async def compute() -> List[Dict[str, Any]]:
+            nonlocal computed
+            computed = True
+            return await self._search_documents(query, limit, min_certainty, max_distance)
+        
+        documents = await self.cache.get_or_compute(
+            query,
+            {"limit": limit, "min_certainty": min_certainty, "max_distance": max_distance},
+            compute
+        )
+        if computed:
+            return documents
+        return [{**doc, "cached": True} for doc in documents]
+    
+    async def query_documents_batch(self, queries: List[str], limit: int = 10, min_certainty: Optional[float] = None,
+                                    max_distance: Optional[float] = None,
+                                    concurrency: int = QUERY_BATCH_CONCURRENCY) -> List[List[Dict[str, Any]]]:
+        """Run several related queries (multi-query retrieval, rewrites) and return one result list per query"""
+        # One batched embedding call warms the query-vector cache for every search below
+        await self._embed_queries(list(dict.fromkeys(queries)))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _one(query: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.query_documents(query, limit, min_certainty, max_distance)
+        
+        return await asyncio.gather(*[_one(query) for query in queries])
+    
+    async def _embed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a query locally (LRU-cached), or None when no local embedding model is configured"""
+        return (await self._embed_queries([query]))[0]
+    
+    async def _embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed queries locally in one batch, reusing LRU-cached vectors; all None without a local model"""
+        embeddings = [self._query_embeddings.get(query) for query in queries]
+        for query, embedding in zip(queries, embeddings):
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        embedder = await asyncio.to_thread(get_embedder)
+        if embedder is None:
+            return embeddings
+        
+        vectors = await asyncio.to_thread(embedder.embed, [queries[i] for i in missing])
+        for i, vector in zip(missing, vectors):
+            embeddings[i] = vector
+            self._query_embeddings[queries[i]] = vector
+        while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embeddings
+    
+    async def _search_documents(self, query: str, limit: int, min_certainty: Optional[float],
+                                max_distance: Optional[float]) -> List[Dict[str, Any]]:
+        """Run the vector search in Weaviate, cut off server-side by certainty or distance"""
+        from weaviate.classes.query import MetadataQuery
+        
+        # Failures propagate to the caller, which logs once at the request boundary
+        logger.info(f"🔍 Querying documents: {query[:50]}...")
+        
+        # Weaviate accepts one threshold per search; certainty wins if both are given
+        search_args = {
+            "limit": limit,
+            "return_properties": QUERY_DOCUMENT_FIELDS,
+            "return_metadata": MetadataQuery(certainty=True, distance=True)
+        }
+        if min_certainty is not None:
+            search_args["certainty"] = min_certainty
+        elif max_distance is not None:
+            search_args["distance"] = max_distance
+        
+        collection = self.client.collections.get("Document")
+        
+        # With a local embedder the query vector is computed here, sparing Weaviate's vectorizer
+        query_vector = await self._embed_query(query)
+        if query_vector is not None:
+            response = await asyncio.to_thread(collection.query.near_vector, query_vector, **search_args)
+        else:
+            response = await asyncio.to_thread(collection.query.near_text, query, **search_args)
+        
+        documents = [
+            {
+                # v4 returns None for unset properties
+                "content": (props := obj.properties).get("content") or "",
+                "filename": props.get("filename") or "",
+                "document_type": props.get("document_type") or "",
+                "entities": props.get("entities") or [],
+                "s3_uri": props.get("s3_uri") or "",
+                "certainty": (meta := obj.metadata).certainty or 0,
+                "distance": meta.distance or 0
+            }
+            for obj in response.objects
+        ]
+        
+        logger.info(f"✅ Found {len(documents)} relevant documents")
+        return documents
+    
+    async def get_knowledge_graph(self, compact: bool = False) -> Dict[str, Any]:
+        """Get knowledge graph data for visualization, optionally in compact CSR form (see GraphBuilder.to_csr)"""
+        graph = await self._knowledge_graph()
+        return graph.to_csr() if compact else graph.to_dict()
+    
+    async def get_node_neighbors(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """One node with its incoming and outgoing edges and the nodes at their other end, or None if unknown"""
+        graph = await self._knowledge_graph()
+        if not graph.has_node(node_id) and self._graph is not None and self._graph[1] is graph:
+            # The cached graph may predate an upload handled by another worker; rebuild once before giving up
+            self._graph = None
+            graph = await self._knowledge_graph()
+        if not graph.has_node(node_id):
+            return None
+        
+        pairs = graph.neighbors(node_id)
+        return {
+            "node": graph.nodes[graph.node_id_to_idx[node_id]],
+            "neighbors": list({neighbor["id"]: neighbor for neighbor, _ in pairs}.values()),
+            "edges": [edge for _, edge in pairs]
+        }
+    
+    async def _knowledge_graph(self) -> GraphBuilder:
+        """Build the graph from stored documents (reused until the next write), or return the shared sample graph"""
+        # In mock mode, always use sample data
+        if self.client is None:
+            logger.info("🎭 Using sample knowledge graph data (mock mode)")
+            return self._build_sample_graph()
+        
+        if self._graph is not None and self._graph[0] > time.monotonic():
+            return self._graph[1]
+        
+        from weaviate.exceptions import WeaviateBaseError
+        
+        logger.info("📊 Building knowledge graph")
+        generation = self._graph_generation
+        
+        # Try to get real documents first (when Weaviate is actually connected)
+        try:
+            documents = await asyncio.to_thread(self._fetch_graph_documents)
+        except WeaviateBaseError as e:
+            logger.info(f"🎭 Falling back to sample knowledge graph data: {e}")
+            return self._build_sample_graph()
+        
+        if documents:
+            graph = GraphBuilder()
+            doc_ids = [f"doc_{doc['id']}" for doc in documents]
             
-            # If no real documents, generate comprehensive sample data
-            if not has_real_documents:
-                logger.info("📊 No real documents found, generating comprehensive sample knowledge graph")
-                sample_data = self._generate_comprehensive_sample_graph()
-                nodes = sample_data["nodes"]
-                edges = sample_data["edges"]
+            # Create document nodes
+            for i, (doc_id, doc) in enumerate(zip(doc_ids, documents)):
+                graph.add_node(self._document_node(doc_id, doc, i))
             
-            logger.info(f"✅ Generated graph with {len(nodes)} nodes and {len(edges)} edges")
+            # Create one node per distinct canonical entity
+            display_forms: Dict[str, str] = {}
+            doc_terms = [self._document_terms(doc, display_forms) for doc in documents]
+            for term, display in display_forms.items():
+                graph.add_node(self._entity_node(term, display))
             
-            return {
-                "nodes": nodes,
-                "edges": edges
-            }
+            # Create edges between documents and their (distinct) entities
+            graph.add_edges(
+                (doc_id, f"entity_{term}", "contains") for doc_id, terms in zip(doc_ids, doc_terms) for term in terms
+            )
+        else:
+            # If no real documents, generate comprehensive sample data
+            logger.info("📊 No real documents found, generating comprehensive sample knowledge graph")
+            graph = self._build_sample_graph()
+        
+        logger.info(f"✅ Generated graph with {len(graph.nodes)} nodes and {graph.edge_count} edges")
+        # A write during the build may not be reflected in it, so only cache if none happened
+        if generation == self._graph_generation:
+            self._graph = (time.monotonic() + GRAPH_CACHE_TTL_SECONDS, graph)
+        return graph
+    
+    async def stream_knowledge_graph(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ("node", node) items followed by ("edge", edge) items without materializing the whole graph
+        
+        Real documents are pulled one cursor page at a time, so only the current page and the
+        (source, target) edge pairs are held in memory.
+        """
+        if self.client is None:
+            logger.info("🎭 Streaming sample knowledge graph data (mock mode)")
+            async for item in self._stream_sample_graph():
+                yield item
+            return
+        
+        from weaviate.exceptions import WeaviateBaseError
+        
+        pages = self._graph_document_pages()
+        try:
+            page = await asyncio.to_thread(next, pages, None)
+        except WeaviateBaseError as e:
+            logger.info(f"🎭 Falling back to sample knowledge graph data: {e}")
+            page = None
+        
+        if not page:
+            async for item in self._stream_sample_graph():
+                yield item
+            return
+        
+        display_forms: Dict[str, str] = {}
+        seen_entities = set()
+        edge_pairs = []
+        index = 0
+        while page:
+            for doc in page:
+                doc_id = f"doc_{doc['id']}"
+                yield "node", self._document_node(doc_id, doc, index)
+                index += 1
+                
+                for term in self._document_terms(doc, display_forms):
+                    if term not in seen_entities:
+                        seen_entities.add(term)
+                        yield "node", self._entity_node(term, display_forms[term])
+                    edge_pairs.append((doc_id, term))
             
-        except Exception as e:
-            logger.error(f"❌ Failed to generate knowledge graph: {e}")
-            raise
+            page = await asyncio.to_thread(next, pages, None)
+        
+        for doc_id, term in edge_pairs:
+            yield "edge", {"source": doc_id, "target": f"entity_{term}", "label": "contains"}
+        
+        logger.info(f"✅ Streamed graph with {index + len(seen_entities)} nodes and {len(edge_pairs)} edges")
     
-    def _generate_comprehensive_sample_graph(self) -> Dict[str, Any]:
-        """Generate massive interconnected knowledge graph with 200+ nodes and extensive relationships"""
-        nodes = []
-        edges = []
+    async def _stream_sample_graph(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield the cached sample graph in stream_knowledge_graph's item format"""
+        graph = self._build_sample_graph()
+        for node in graph.nodes:
+            yield "node", node
+        for edge in graph.iter_edges():
+            yield "edge", edge
+    
+    @staticmethod
+    def _document_node(doc_id: str, doc: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Graph node for a stored document"""
+        entities = doc.get("entities") or []
+        return {
+            "id": doc_id,
+            "label": doc.get("filename") or f"Document {index}",
+            # Each fetched object carries its own copy of the type string; share one per distinct value
+            "type": sys.intern(doc.get("document_type") or "general"),
+            "entities": entities,
+            "content_preview": (doc.get("content_preview") or "") + "...",
+            "summary": f"Document containing information about {', '.join(entities[:3])}",
+            "key_terms": entities[:5]
+        }
+    
+    @staticmethod
+    def _document_terms(doc: Dict[str, Any], display_forms: Dict[str, str]) -> List[str]:
+        """Distinct canonical entity terms of a document, recording each new term's first-seen surface form"""
+        terms = {}
+        for entity in doc.get("entities") or []:
+            term = _canonical_term(entity)
+            if term:
+                display_forms.setdefault(term, " ".join(entity.split()))
+                terms[term] = None
+        return list(terms)
+    
+    @staticmethod
+    def _entity_node(term: str, display: str) -> Dict[str, Any]:
+        """Graph node for an entity extracted from stored documents"""
+        return {
+            "id": f"entity_{term}",
+            "label": display,
+            "type": "entity",
+            "summary": f"Entity extracted from enterprise documents",
+            "key_terms": [term]
+        }
+    
+    def _graph_document_pages(self):
+        """Blocking generator of Document graph fields, one list of up to GRAPH_PAGE_SIZE objects per cursor request"""
+        collection = self.client.collections.get("Document")
+        objects = collection.iterator(return_properties=GRAPH_DOCUMENT_FIELDS, cache_size=GRAPH_PAGE_SIZE)
+        while page := [{"id": str(obj.uuid), **obj.properties} for obj in itertools.islice(objects, GRAPH_PAGE_SIZE)]:
+            yield page
+    
+    def _fetch_graph_documents(self) -> List[Dict[str, Any]]:
+        """Read every Document's graph fields with the cursor iterator, GRAPH_PAGE_SIZE objects per request"""
+        return [doc for page in self._graph_document_pages() for doc in page]
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_sample_graph() -> GraphBuilder:
+        """Generate massive interconnected knowledge graph with 200+ nodes and extensive relationships
         
-        # Core Enterprise Departments (expanded)
-        departments = [
-            {
-                "name": "Human Resources", "color": "#FF6B6B",
-                "documents": [
-                    {"name": "Employee Handbook 2024", "type": "policy", "summary": "Comprehensive guide covering employee policies, benefits, code of conduct, and workplace procedures", "key_terms": ["employee", "benefits", "policy", "conduct", "workplace", "handbook", "procedures"]},
-                    {"name": "Diversity & Inclusion Policy", "type": "policy", "summary": "Framework for promoting diversity, equity, and inclusion across all organizational levels", "key_terms": ["diversity", "inclusion", "equity", "discrimination", "workplace", "framework", "organizational"]},
-                    {"name": "Remote Work Guidelines", "type": "procedure", "summary": "Detailed procedures for remote work arrangements, equipment, and productivity standards", "key_terms": ["remote", "work", "equipment", "productivity", "guidelines", "arrangements", "standards"]},
-                    {"name": "Performance Review Process", "type": "procedure", "summary": "Annual performance evaluation methodology, criteria, and improvement planning", "key_terms": ["performance", "review", "evaluation", "improvement", "criteria", "annual", "methodology"]},
-                    {"name": "Compensation Structure", "type": "policy", "summary": "Salary bands, bonus structures, and equity compensation frameworks", "key_terms": ["salary", "compensation", "bonus", "equity", "benefits", "structure", "framework"]},
-                    {"name": "Training & Development Program", "type": "program", "summary": "Comprehensive learning and development initiatives for skill enhancement", "key_terms": ["training", "development", "learning", "skills", "enhancement", "program", "initiatives"]},
-                    {"name": "Employee Wellness Initiative", "type": "program", "summary": "Health and wellness programs promoting work-life balance", "key_terms": ["wellness", "health", "work-life", "balance", "employee", "program", "initiative"]},
-                    {"name": "Recruitment Strategy", "type": "strategy", "summary": "Talent acquisition and recruitment process optimization", "key_terms": ["recruitment", "talent", "acquisition", "hiring", "strategy", "process", "optimization"]}
-                ]
-            },
-            {
-                "name": "Information Technology", "color": "#4ECDC4",
-                "documents": [
-                    {"name": "Cybersecurity Framework", "type": "policy", "summary": "Comprehensive security protocols, threat detection, and incident response procedures", "key_terms": ["cybersecurity", "threats", "incident", "response", "protocols", "security", "detection"]},
-                    {"name": "Data Governance Policy", "type": "policy", "summary": "Data classification, retention, privacy, and compliance management guidelines", "key_terms": ["data", "governance", "privacy", "compliance", "retention", "classification", "management"]},
-                    {"name": "Cloud Infrastructure Guide", "type": "technical", "summary": "AWS cloud architecture, deployment strategies, and cost optimization practices", "key_terms": ["cloud", "aws", "infrastructure", "deployment", "optimization", "architecture", "strategies"]},
-                    {"name": "Software Development Standards", "type": "procedure", "summary": "Coding standards, testing protocols, and deployment pipeline requirements", "key_terms": ["development", "coding", "testing", "deployment", "standards", "pipeline", "protocols"]},
-                    {"name": "IT Asset Management", "type": "procedure", "summary": "Hardware and software inventory, lifecycle management, and procurement processes", "key_terms": ["assets", "inventory", "lifecycle", "procurement", "management", "hardware", "software"]},
-                    {"name": "DevOps Methodology", "type": "framework", "summary": "Continuous integration and deployment practices", "key_terms": ["devops", "continuous", "integration", "deployment", "automation", "methodology", "practices"]},
-                    {"name": "API Documentation Standards", "type": "technical", "summary": "REST API design patterns and documentation requirements", "key_terms": ["api", "rest", "documentation", "design", "patterns", "standards", "requirements"]},
-                    {"name": "Database Management Procedures", "type": "procedure", "summary": "Database optimization, backup, and recovery protocols", "key_terms": ["database", "optimization", "backup", "recovery", "procedures", "management", "protocols"]}
-                ]
-            },
-            {
-                "name": "Finance", "color": "#45B7D1",
-                "documents": [
-                    {"name": "Financial Reporting Standards", "type": "policy", "summary": "GAAP compliance, quarterly reporting, and audit preparation procedures", "key_terms": ["financial", "reporting", "gaap", "audit", "compliance", "quarterly", "standards"]},
-                    {"name": "Budget Planning Process", "type": "procedure", "summary": "Annual budget creation, departmental allocations, and variance analysis", "key_terms": ["budget", "planning", "allocation", "variance", "analysis", "annual", "departmental"]},
-                    {"name": "Expense Management Policy", "type": "policy", "summary": "Travel expenses, procurement approvals, and reimbursement procedures", "key_terms": ["expense", "travel", "procurement", "approval", "reimbursement", "management", "procedures"]},
-                    {"name": "Risk Management Framework", "type": "policy", "summary": "Financial risk assessment, mitigation strategies, and monitoring protocols", "key_terms": ["risk", "assessment", "mitigation", "monitoring", "financial", "framework", "strategies"]},
-                    {"name": "Vendor Payment Procedures", "type": "procedure", "summary": "Invoice processing, payment terms, and vendor relationship management", "key_terms": ["vendor", "payment", "invoice", "terms", "relationship", "processing", "procedures"]},
-                    {"name": "Investment Policy", "type": "policy", "summary": "Corporate investment guidelines and portfolio management", "key_terms": ["investment", "portfolio", "corporate", "guidelines", "management", "policy", "financial"]},
-                    {"name": "Tax Compliance Manual", "type": "manual", "summary": "Tax obligations, filing procedures, and compliance requirements", "key_terms": ["tax", "compliance", "filing", "obligations", "requirements", "manual", "procedures"]},
-                    {"name": "Financial Controls Framework", "type": "framework", "summary": "Internal controls and financial oversight mechanisms", "key_terms": ["controls", "oversight", "internal", "financial", "framework", "mechanisms", "governance"]}
-                ]
-            },
-            {
-                "name": "Legal & Compliance", "color": "#96CEB4",
-                "documents": [
-                    {"name": "GDPR Compliance Manual", "type": "policy", "summary": "European data protection regulations, consent management, and breach procedures", "key_terms": ["gdpr", "data protection", "consent", "breach", "privacy", "european", "regulations"]},
-                    {"name": "Contract Management System", "type": "procedure", "summary": "Contract lifecycle, approval workflows, and legal review processes", "key_terms": ["contract", "lifecycle", "approval", "legal", "review", "workflows", "management"]},
-                    {"name": "Intellectual Property Policy", "type": "policy", "summary": "Patent protection, trademark management, and trade secret protocols", "key_terms": ["intellectual property", "patent", "trademark", "trade secret", "protection", "management", "protocols"]},
-                    {"name": "Regulatory Compliance Framework", "type": "policy", "summary": "Industry regulations, compliance monitoring, and reporting requirements", "key_terms": ["regulatory", "compliance", "monitoring", "reporting", "requirements", "industry", "framework"]},
-                    {"name": "Ethics and Conduct Code", "type": "policy", "summary": "Ethical guidelines, conflict of interest, and whistleblower procedures", "key_terms": ["ethics", "conduct", "conflict", "whistleblower", "guidelines", "ethical", "procedures"]},
-                    {"name": "Litigation Management", "type": "procedure", "summary": "Legal dispute resolution and litigation handling processes", "key_terms": ["litigation", "dispute", "resolution", "legal", "management", "processes", "handling"]},
-                    {"name": "Corporate Governance Policy", "type": "policy", "summary": "Board oversight, executive accountability, and governance structures", "key_terms": ["governance", "board", "oversight", "accountability", "corporate", "structures", "executive"]},
-                    {"name": "Privacy Impact Assessment", "type": "framework", "summary": "Privacy risk evaluation and mitigation procedures", "key_terms": ["privacy", "impact", "assessment", "risk", "evaluation", "mitigation", "procedures"]}
-                ]
-            },
-            {
-                "name": "Operations", "color": "#FECA57",
-                "documents": [
-                    {"name": "Quality Management System", "type": "procedure", "summary": "ISO 9001 compliance, quality control processes, and continuous improvement", "key_terms": ["quality", "iso", "control", "improvement", "management", "continuous", "compliance"]},
-                    {"name": "Supply Chain Management", "type": "procedure", "summary": "Supplier selection, logistics coordination, and inventory optimization", "key_terms": ["supply chain", "supplier", "logistics", "inventory", "optimization", "coordination", "selection"]},
-                    {"name": "Business Continuity Plan", "type": "policy", "summary": "Disaster recovery, emergency procedures, and operational resilience", "key_terms": ["continuity", "disaster", "recovery", "emergency", "resilience", "operational", "procedures"]},
-                    {"name": "Customer Service Standards", "type": "procedure", "summary": "Service level agreements, customer satisfaction metrics, and escalation procedures", "key_terms": ["customer service", "sla", "satisfaction", "escalation", "standards", "metrics", "agreements"]},
-                    {"name": "Facility Management Guidelines", "type": "procedure", "summary": "Office space management, maintenance schedules, and safety protocols", "key_terms": ["facility", "office", "maintenance", "safety", "management", "schedules", "protocols"]},
-                    {"name": "Process Optimization Framework", "type": "framework", "summary": "Lean methodology and process improvement initiatives", "key_terms": ["process", "optimization", "lean", "methodology", "improvement", "framework", "initiatives"]},
-                    {"name": "Vendor Management Program", "type": "program", "summary": "Vendor evaluation, performance monitoring, and relationship management", "key_terms": ["vendor", "evaluation", "performance", "monitoring", "relationship", "management", "program"]},
-                    {"name": "Environmental Sustainability Policy", "type": "policy", "summary": "Green initiatives, carbon footprint reduction, and sustainability goals", "key_terms": ["environmental", "sustainability", "green", "carbon", "footprint", "reduction", "initiatives"]}
-                ]
-            },
-            {
-                "name": "Marketing", "color": "#FF9FF3",
-                "documents": [
-                    {"name": "Brand Guidelines", "type": "policy", "summary": "Brand identity, visual standards, and messaging consistency requirements", "key_terms": ["brand", "identity", "visual", "messaging", "consistency", "guidelines", "standards"]},
-                    {"name": "Digital Marketing Strategy", "type": "strategy", "summary": "SEO optimization, social media campaigns, and content marketing frameworks", "key_terms": ["digital", "marketing", "seo", "social media", "content", "optimization", "campaigns"]},
-                    {"name": "Customer Data Privacy", "type": "policy", "summary": "Marketing data collection, consent management, and privacy compliance", "key_terms": ["customer data", "privacy", "consent", "collection", "compliance", "marketing", "management"]},
-                    {"name": "Campaign Management Process", "type": "procedure", "summary": "Campaign planning, execution, measurement, and optimization procedures", "key_terms": ["campaign", "planning", "execution", "measurement", "optimization", "management", "procedures"]},
-                    {"name": "Public Relations Guidelines", "type": "procedure", "summary": "Media relations, crisis communication, and public statement protocols", "key_terms": ["public relations", "media", "crisis", "communication", "protocols", "guidelines", "statements"]},
-                    {"name": "Market Research Framework", "type": "framework", "summary": "Customer insights, market analysis, and competitive intelligence", "key_terms": ["market research", "insights", "analysis", "competitive", "intelligence", "customer", "framework"]},
-                    {"name": "Content Strategy", "type": "strategy", "summary": "Content creation, distribution, and engagement optimization", "key_terms": ["content", "creation", "distribution", "engagement", "optimization", "strategy", "marketing"]},
-                    {"name": "Lead Generation Process", "type": "procedure", "summary": "Lead qualification, nurturing, and conversion optimization", "key_terms": ["lead", "generation", "qualification", "nurturing", "conversion", "optimization", "process"]}
-                ]
-            },
-            {
-                "name": "Sales", "color": "#54A0FF",
-                "documents": [
-                    {"name": "Sales Methodology", "type": "framework", "summary": "Sales process, qualification criteria, and closing techniques", "key_terms": ["sales", "methodology", "process", "qualification", "closing", "techniques", "framework"]},
-                    {"name": "Customer Relationship Management", "type": "procedure", "summary": "CRM usage, customer data management, and relationship building", "key_terms": ["crm", "customer", "relationship", "data", "management", "building", "procedures"]},
-                    {"name": "Territory Management", "type": "strategy", "summary": "Sales territory allocation, coverage optimization, and performance tracking", "key_terms": ["territory", "allocation", "coverage", "optimization", "performance", "tracking", "sales"]},
-                    {"name": "Pricing Strategy", "type": "strategy", "summary": "Pricing models, discount policies, and competitive positioning", "key_terms": ["pricing", "models", "discount", "policies", "competitive", "positioning", "strategy"]},
-                    {"name": "Sales Training Program", "type": "program", "summary": "Sales skills development, product training, and certification", "key_terms": ["sales training", "skills", "development", "product", "certification", "program", "learning"]},
-                    {"name": "Channel Partner Management", "type": "procedure", "summary": "Partner onboarding, enablement, and performance management", "key_terms": ["channel", "partner", "onboarding", "enablement", "performance", "management", "procedures"]},
-                    {"name": "Sales Forecasting", "type": "procedure", "summary": "Revenue prediction, pipeline analysis, and forecast accuracy", "key_terms": ["forecasting", "revenue", "prediction", "pipeline", "analysis", "accuracy", "sales"]},
-                    {"name": "Customer Success Framework", "type": "framework", "summary": "Customer onboarding, retention, and expansion strategies", "key_terms": ["customer success", "onboarding", "retention", "expansion", "strategies", "framework", "satisfaction"]}
-                ]
-            },
-            {
-                "name": "Product Management", "color": "#5F27CD",
-                "documents": [
-                    {"name": "Product Roadmap", "type": "strategy", "summary": "Product vision, feature prioritization, and release planning", "key_terms": ["product", "roadmap", "vision", "prioritization", "release", "planning", "features"]},
-                    {"name": "User Experience Guidelines", "type": "guidelines", "summary": "UX design principles, usability standards, and user research", "key_terms": ["ux", "design", "usability", "user research", "principles", "standards", "experience"]},
-                    {"name": "Product Requirements Document", "type": "technical", "summary": "Feature specifications, acceptance criteria, and technical requirements", "key_terms": ["requirements", "specifications", "acceptance", "criteria", "technical", "features", "product"]},
-                    {"name": "Agile Development Process", "type": "framework", "summary": "Scrum methodology, sprint planning, and iterative development", "key_terms": ["agile", "scrum", "sprint", "planning", "iterative", "development", "methodology"]},
-                    {"name": "Product Analytics Framework", "type": "framework", "summary": "Metrics tracking, user behavior analysis, and performance monitoring", "key_terms": ["analytics", "metrics", "tracking", "behavior", "analysis", "performance", "monitoring"]},
-                    {"name": "Go-to-Market Strategy", "type": "strategy", "summary": "Product launch, market positioning, and customer acquisition", "key_terms": ["go-to-market", "launch", "positioning", "acquisition", "customer", "strategy", "market"]},
-                    {"name": "Competitive Analysis", "type": "analysis", "summary": "Market research, competitor evaluation, and positioning strategy", "key_terms": ["competitive", "analysis", "market research", "competitor", "evaluation", "positioning", "strategy"]},
-                    {"name": "Product Lifecycle Management", "type": "framework", "summary": "Product development stages, lifecycle optimization, and end-of-life planning", "key_terms": ["lifecycle", "development", "stages", "optimization", "end-of-life", "planning", "product"]}
-                ]
-            }
-        ]
+        The result is cached and shared, so callers must not add to it.
+        """
+        graph = GraphBuilder()
+        # (node id, key terms, edge label) for every node linked to its entities, emitted in one pass below
+        entity_links = []
         
         # Generate department nodes
-        for dept in departments:
+        for dept in SAMPLE_DEPARTMENTS:
+            dept_name_lower = sys.intern(dept['name'].lower())
+            dept_id = _slug(dept['name'])
             dept_node = {
-                "id": f"dept_{dept['name'].lower().replace(' ', '_').replace('&', 'and')}",
+                "id": f"dept_{dept_id}",
                 "label": dept['name'],
                 "type": "department",
                 "color": dept.get("color", "#888888"),
-                "summary": f"Enterprise department responsible for {dept['name'].lower()} operations and policies",
-                "key_terms": [dept['name'].lower(), "department", "enterprise", "operations"],
+                "summary": f"Enterprise department responsible for {dept_name_lower} operations and policies",
+                "key_terms": (dept_name_lower, *SAMPLE_DEPARTMENT_TERMS),
                 "content_preview": f"{dept['name']} department managing organizational functions..."
             }
-            nodes.append(dept_node)
+            graph.add_node(dept_node)
             
             # Generate document nodes for each department
             for doc in dept['documents']:
+                key_terms = tuple(doc['key_terms'])
                 doc_node = {
-                    "id": f"doc_{dept['name'].lower().replace(' ', '_').replace('&', 'and')}_{doc['name'].lower().replace(' ', '_').replace('&', 'and')}",
+                    "id": f"doc_{dept_id}_{_slug(doc['name'])}",
                     "label": doc['name'],
                     "type": doc['type'],
                     "summary": doc['summary'],
-                    "key_terms": doc['key_terms'],
+                    "key_terms": key_terms,
                     "content_preview": doc['summary'][:100] + "...",
-                    "entities": doc['key_terms'][:3]
+                    "entities": key_terms[:3]
                 }
-                nodes.append(doc_node)
+                graph.add_node(doc_node)
+                if doc['type'] in SAMPLE_DOCUMENT_TYPES:
+                    entity_links.append((doc_node["id"], key_terms, "contains"))
+                if doc['type'] in SAMPLE_SYSTEM_TYPES:
+                    entity_links.append((doc_node["id"], key_terms, "utilizes"))
                 
                 # Create edge between department and document
-                edges.append({
-                    "source": dept_node["id"],
-                    "target": doc_node["id"],
-                    "label": "manages"
-                })
-        
-        # Generate comprehensive entity nodes
-        all_entities = set()
-        for node in nodes:
-            if node.get("key_terms"):
-                all_entities.update(node["key_terms"])
-        
-        # Create entity nodes with enhanced metadata
-        for entity in all_entities:
+                graph.add_edge(dept_node["id"], doc_node["id"], "manages")
+        
+        # Generate comprehensive entity nodes, folding case/whitespace variants of a term onto one
+        # canonical entity labelled from its first-seen surface form. Every raw term's entity id is
+        # computed once and reused by the edge loops below
+        display_forms: Dict[str, str] = {}
+        term_to_entity_id: Dict[str, str] = {}
+        for node in graph.nodes:
+            for term in node.get("key_terms") or ():
+                if term not in term_to_entity_id:
+                    canonical = _canonical_term(term)
+                    display_forms.setdefault(canonical, term)
+                    term_to_entity_id[term] = _entity_id(canonical)
+        
+        # Create entity nodes with enhanced metadata; distinct terms can normalize to the same
+        # id (e.g. "data governance" / "data_governance"), so dedupe on the id, not the term
+        seen_entity_ids = set()
+        for entity, display in display_forms.items():
+            entity_id = _entity_id(entity)
+            if entity_id in seen_entity_ids:
+                continue
+            seen_entity_ids.add(entity_id)
             entity_node = {
-                "id": f"entity_{entity.replace(' ', '_').replace('&', 'and')}",
-                "label": entity.title(),
+                "id": entity_id,
+                "label": display.title(),
                 "type": "entity",
                 "summary": f"Key concept or term related to enterprise operations: {entity}",
-                "key_terms": [entity, "concept", "enterprise"],
+                "key_terms": (entity, *SAMPLE_ENTITY_TERMS),
                 "content_preview": f"Entity representing {entity} across various enterprise documents..."
             }
-            nodes.append(entity_node)
-        
-        # Create edges between documents and entities (creates spider web effect)
-        for node in nodes:
-            if node["type"] in ["policy", "procedure", "technical", "strategy", "framework", "program", "manual", "guidelines", "analysis"]:
-                for term in node.get("key_terms", []):
-                    entity_id = f"entity_{term.replace(' ', '_').replace('&', 'and')}"
-                    if any(n["id"] == entity_id for n in nodes):
-                        edges.append({
-                            "source": node["id"],
-                            "target": entity_id,
-                            "label": "contains"
-                        })
+            graph.add_node(entity_node)
         
         # Add extensive cross-departmental connections
-        cross_connections = [
-            ("dept_human_resources", "dept_legal_and_compliance", "collaborates"),
-            ("dept_information_technology", "dept_finance", "supports"),
-            ("dept_operations", "dept_marketing", "coordinates"),
-            ("dept_legal_and_compliance", "dept_finance", "oversees"),
-            ("dept_information_technology", "dept_operations", "enables"),
-            ("dept_marketing", "dept_human_resources", "partners"),
-            ("dept_sales", "dept_marketing", "collaborates"),
-            ("dept_product_management", "dept_sales", "supports"),
-            ("dept_product_management", "dept_marketing", "coordinates"),
-            ("dept_information_technology", "dept_product_management", "develops"),
-            ("dept_operations", "dept_sales", "fulfills"),
-            ("dept_finance", "dept_sales", "tracks"),
-            ("dept_human_resources", "dept_product_management", "staffs"),
-            ("dept_legal_and_compliance", "dept_product_management", "reviews"),
-            ("dept_operations", "dept_finance", "reports_to"),
-            ("dept_marketing", "dept_finance", "budgets_with"),
-            ("dept_sales", "dept_finance", "forecasts_with"),
-            ("dept_information_technology", "dept_legal_and_compliance", "secures_for"),
-            ("dept_human_resources", "dept_operations", "trains_for"),
-            ("dept_product_management", "dept_operations", "delivers_through")
-        ]
-        
-        for source, target, label in cross_connections:
-            edges.append({
-                "source": source,
-                "target": target,
-                "label": label
-            })
-        
-        # Add comprehensive system and process nodes
-        systems_and_processes = [
-            # Core Systems
-            {"id": "system_erp", "label": "ERP System", "type": "system", "summary": "Enterprise Resource Planning system integrating business processes", "key_terms": ["erp", "integration", "business process", "automation", "enterprise"], "connects_to": ["dept_finance", "dept_operations", "dept_human_resources"]},
-            {"id": "system_crm", "label": "CRM Platform", "type": "system", "summary": "Customer Relationship Management platform", "key_terms": ["crm", "customer", "sales", "service", "relationship"], "connects_to": ["dept_sales", "dept_marketing", "dept_operations"]},
-            {"id": "system_hrms", "label": "HRMS", "type": "system", "summary": "Human Resource Management System", "key_terms": ["hrms", "human resources", "employee", "management", "payroll"], "connects_to": ["dept_human_resources", "dept_finance"]},
-            {"id": "system_bi", "label": "Business Intelligence", "type": "system", "summary": "Data analytics and reporting platform", "key_terms": ["business intelligence", "analytics", "reporting", "data", "insights"], "connects_to": ["dept_finance", "dept_marketing", "dept_sales", "dept_operations"]},
-            {"id": "system_cms", "label": "Content Management", "type": "system", "summary": "Content creation and management platform", "key_terms": ["cms", "content", "management", "publishing", "digital"], "connects_to": ["dept_marketing", "dept_product_management"]},
-            
-            # Infrastructure
-            {"id": "infra_cloud", "label": "Cloud Infrastructure", "type": "infrastructure", "summary": "AWS cloud computing infrastructure", "key_terms": ["cloud", "aws", "infrastructure", "computing", "scalability"], "connects_to": ["dept_information_technology", "dept_operations"]},
-            {"id": "infra_network", "label": "Network Infrastructure", "type": "infrastructure", "summary": "Corporate network and connectivity", "key_terms": ["network", "connectivity", "infrastructure", "security", "bandwidth"], "connects_to": ["dept_information_technology", "dept_operations"]},
-            {"id": "infra_security", "label": "Security Infrastructure", "type": "infrastructure", "summary": "Cybersecurity and data protection systems", "key_terms": ["security", "cybersecurity", "protection", "firewall", "encryption"], "connects_to": ["dept_information_technology", "dept_legal_and_compliance"]},
-            
-            # Business Processes
-            {"id": "process_onboarding", "label": "Employee Onboarding", "type": "process", "summary": "New employee integration process", "key_terms": ["onboarding", "employee", "integration", "training", "orientation"], "connects_to": ["dept_human_resources", "dept_information_technology"]},
-            {"id": "process_procurement", "label": "Procurement Process", "type": "process", "summary": "Vendor selection and purchasing workflow", "key_terms": ["procurement", "vendor", "purchasing", "approval", "workflow"], "connects_to": ["dept_finance", "dept_operations", "dept_legal_and_compliance"]},
-            {"id": "process_product_dev", "label": "Product Development", "type": "process", "summary": "Product ideation to launch process", "key_terms": ["product development", "ideation", "launch", "innovation", "lifecycle"], "connects_to": ["dept_product_management", "dept_information_technology", "dept_marketing"]},
-            {"id": "process_customer_support", "label": "Customer Support", "type": "process", "summary": "Customer service and issue resolution", "key_terms": ["customer support", "service", "resolution", "satisfaction", "helpdesk"], "connects_to": ["dept_operations", "dept_sales", "dept_information_technology"]},
-            
-            # Frameworks and Methodologies
-            {"id": "framework_agile", "label": "Agile Framework", "type": "framework", "summary": "Agile development methodology", "key_terms": ["agile", "methodology", "scrum", "development", "iterative"], "connects_to": ["dept_information_technology", "dept_product_management"]},
-            {"id": "framework_lean", "label": "Lean Methodology", "type": "framework", "summary": "Lean process optimization", "key_terms": ["lean", "optimization", "efficiency", "waste", "continuous improvement"], "connects_to": ["dept_operations", "dept_product_management"]},
-            {"id": "framework_devops", "label": "DevOps Framework", "type": "framework", "summary": "Development and operations integration", "key_terms": ["devops", "integration", "automation", "deployment", "collaboration"], "connects_to": ["dept_information_technology", "dept_operations"]},
-            
-            # Compliance and Governance
-            {"id": "compliance_sox", "label": "SOX Compliance", "type": "compliance", "summary": "Sarbanes-Oxley compliance framework", "key_terms": ["sox", "compliance", "financial", "reporting", "controls"], "connects_to": ["dept_finance", "dept_legal_and_compliance"]},
-            {"id": "compliance_iso", "label": "ISO Standards", "type": "compliance", "summary": "International Organization for Standardization compliance", "key_terms": ["iso", "standards", "quality", "management", "certification"], "connects_to": ["dept_operations", "dept_legal_and_compliance"]},
-            {"id": "governance_data", "label": "Data Governance", "type": "governance", "summary": "Data management and privacy governance", "key_terms": ["data governance", "privacy", "management", "quality", "stewardship"], "connects_to": ["dept_information_technology", "dept_legal_and_compliance"]},
-            
-            # Analytics and Metrics
-            {"id": "metrics_kpi", "label": "KPI Dashboard", "type": "metrics", "summary": "Key Performance Indicators tracking", "key_terms": ["kpi", "metrics", "performance", "dashboard", "tracking"], "connects_to": ["dept_finance", "dept_operations", "dept_sales", "dept_marketing"]},
-            {"id": "analytics_customer", "label": "Customer Analytics", "type": "analytics", "summary": "Customer behavior and satisfaction analysis", "key_terms": ["customer analytics", "behavior", "satisfaction", "analysis", "insights"], "connects_to": ["dept_marketing", "dept_sales", "dept_operations"]},
-            {"id": "analytics_financial", "label": "Financial Analytics", "type": "analytics", "summary": "Financial performance and forecasting", "key_terms": ["financial analytics", "performance", "forecasting", "budgeting", "variance"], "connects_to": ["dept_finance", "dept_operations"]},
-            
-            # Communication and Collaboration
-            {"id": "platform_collaboration", "label": "Collaboration Platform", "type": "platform", "summary": "Team communication and collaboration tools", "key_terms": ["collaboration", "communication", "teams", "productivity", "remote"], "connects_to": ["dept_human_resources", "dept_information_technology"]},
-            {"id": "platform_knowledge", "label": "Knowledge Management", "type": "platform", "summary": "Organizational knowledge sharing platform", "key_terms": ["knowledge management", "sharing", "documentation", "wiki", "learning"], "connects_to": ["dept_human_resources", "dept_information_technology", "dept_operations"]},
-            
-            # External Integrations
-            {"id": "integration_banking", "label": "Banking Integration", "type": "integration", "summary": "Financial institution connectivity", "key_terms": ["banking", "integration", "payments", "transactions", "financial"], "connects_to": ["dept_finance", "dept_information_technology"]},
-            {"id": "integration_partners", "label": "Partner Integrations", "type": "integration", "summary": "Third-party partner system connections", "key_terms": ["partners", "integration", "third-party", "api", "connectivity"], "connects_to": ["dept_sales", "dept_operations", "dept_information_technology"]},
-            
-            # Innovation and Research
-            {"id": "innovation_lab", "label": "Innovation Lab", "type": "innovation", "summary": "Research and development initiatives", "key_terms": ["innovation", "research", "development", "experimentation", "emerging"], "connects_to": ["dept_product_management", "dept_information_technology"]},
-            {"id": "research_market", "label": "Market Research", "type": "research", "summary": "Market analysis and competitive intelligence", "key_terms": ["market research", "analysis", "competitive", "intelligence", "trends"], "connects_to": ["dept_marketing", "dept_product_management", "dept_sales"]}
-        ]
+        graph.add_edges(SAMPLE_CROSS_CONNECTIONS)
         
         # Add all system and process nodes
-        for item in systems_and_processes:
+        for item in SAMPLE_SYSTEMS_AND_PROCESSES:
             node = {
                 "id": item["id"],
                 "label": item["label"],
                 "type": item["type"],
                 "summary": item["summary"],
-                "key_terms": item["key_terms"],
+                "key_terms": tuple(item["key_terms"]),
                 "content_preview": item["summary"][:100] + "..."
             }
-            nodes.append(node)
+            graph.add_node(node)
+            if item["type"] in SAMPLE_SYSTEM_TYPES:
+                entity_links.append((node["id"], node["key_terms"], "utilizes"))
             
             # Connect to relevant departments
-            for dept_connection in item["connects_to"]:
-                edges.append({
-                    "source": item["id"],
-                    "target": dept_connection,
-                    "label": "supports" if item["type"] in ["system", "platform", "infrastructure"] else "implements"
-                })
-        
-        # Add entity connections to systems and processes
-        for node in nodes:
-            if node["type"] in ["system", "platform", "infrastructure", "process", "framework", "compliance", "governance", "metrics", "analytics", "integration", "innovation", "research"]:
-                for term in node.get("key_terms", []):
-                    entity_id = f"entity_{term.replace(' ', '_').replace('&', 'and')}"
-                    if any(n["id"] == entity_id for n in nodes):
-                        edges.append({
-                            "source": node["id"],
-                            "target": entity_id,
-                            "label": "utilizes"
-                        })
+            label = "supports" if item["type"] in SAMPLE_SUPPORT_TYPES else "implements"
+            graph.add_edges((item["id"], dept_connection, label) for dept_connection in item["connects_to"])
         
-        # Add cross-system connections for more spider web effect
-        system_connections = [
-            ("system_erp", "system_crm", "integrates_with"),
-            ("system_crm", "system_bi", "feeds_data_to"),
-            ("system_hrms", "system_erp", "synchronizes_with"),
-            ("infra_cloud", "system_erp", "hosts"),
-            ("infra_cloud", "system_crm", "hosts"),
-            ("infra_security", "infra_cloud", "protects"),
-            ("infra_network", "infra_cloud", "connects_to"),
-            ("process_onboarding", "system_hrms", "uses"),
-            ("process_procurement", "system_erp", "managed_by"),
-            ("framework_agile", "process_product_dev", "guides"),
-            ("framework_lean", "process_procurement", "optimizes"),
-            ("compliance_sox", "system_erp", "governs"),
-            ("governance_data", "system_bi", "oversees"),
-            ("metrics_kpi", "system_bi", "displayed_in"),
-            ("analytics_customer", "system_crm", "analyzes_data_from"),
-            ("analytics_financial", "system_erp", "processes_data_from"),
-            ("platform_collaboration", "process_onboarding", "facilitates"),
-            ("platform_knowledge", "framework_agile", "documents"),
-            ("integration_banking", "system_erp", "connects_to"),
-            ("integration_partners", "system_crm", "extends"),
-            ("innovation_lab", "process_product_dev", "influences"),
-            ("research_market", "analytics_customer", "informs")
-        ]
+        # Connect documents ("contains") and systems/processes ("utilizes") to their entities in a
+        # single pass (creates spider web effect); terms that only appear on systems/processes have
+        # no entity node
+        graph.add_edges(
+            (node_id, entity_id, label)
+            for node_id, key_terms, label in entity_links
+            for term in key_terms
+            if (entity_id := term_to_entity_id.get(term)) is not None
+        )
         
-        for source, target, label in system_connections:
-            edges.append({
-                "source": source,
-                "target": target,
-                "label": label
-            })
+        # Add cross-system connections for more spider web effect
+        graph.add_edges(SAMPLE_SYSTEM_CONNECTIONS)
         
         # Add entity-to-entity relationships for maximum interconnection
-        entity_relationships = [
-            ("entity_employee", "entity_training", "requires"),
-            ("entity_security", "entity_compliance", "ensures"),
-            ("entity_data", "entity_privacy", "protected_by"),
-            ("entity_customer", "entity_satisfaction", "measured_by"),
-            ("entity_process", "entity_optimization", "improved_through"),
-            ("entity_technology", "entity_innovation", "drives"),
-            ("entity_financial", "entity_reporting", "documented_in"),
-            ("entity_quality", "entity_management", "maintained_by"),
-            ("entity_risk", "entity_mitigation", "addressed_through"),
-            ("entity_performance", "entity_metrics", "tracked_by"),
-            ("entity_development", "entity_methodology", "follows"),
-            ("entity_integration", "entity_automation", "enables"),
-            ("entity_governance", "entity_oversight", "provides"),
-            ("entity_analysis", "entity_insights", "generates"),
-            ("entity_collaboration", "entity_productivity", "enhances")
-        ]
-        
-        for source, target, label in entity_relationships:
-            if any(n["id"] == source for n in nodes) and any(n["id"] == target for n in nodes):
-                edges.append({
-                    "source": source,
-                    "target": target,
-                    "label": label
-                })
+        graph.add_edges(
+            (source, target, label) for source, target, label in SAMPLE_ENTITY_RELATIONSHIPS
+            if graph.has_node(source) and graph.has_node(target)
+        )
         
+        return graph
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """Report the state of the shared HTTP pool used for readiness probes"""
         return {
-            "nodes": nodes,
-            "edges": edges
+            "is_closed": self._http is None or self._http.is_closed,
+            "max_connections": HTTP_POOL_MAX_CONNECTIONS
         }
     
+    async def close(self):
+        """Stop the write buffer and release the shared HTTP connection pool"""
+        global _shared_client
+        if _shared_client is self:
+            _shared_client = None
+        
+        if self._write_flusher is not None and not self._write_flusher.done():
+            self._write_flusher.cancel()
+            try:
+                await self._write_flusher
+            except asyncio.CancelledError:
+                pass
+        
+        # Writes still queued behind the cancelled flusher are failed rather than left pending
+        if self._write_queue is not None:
+            queued = []
+            while not self._write_queue.empty():
+                queued.append(self._write_queue.get_nowait())
+            self._fail_writes(queued, Exception("Weaviate client closed before the document was stored"))
+        
+        if self.client is not None:
+            await asyncio.to_thread(self.client.close)
+            self.client = None
+        
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+            logger.info("🔌 Closed Weaviate HTTP connection pool")
+    
     async def health_check(self) -> str:
         """Check Weaviate health"""
         try:
             if not self.client:
                 return "not_initialized"
             
-            if self.client.is_ready():
+            # Probe readiness over the shared pool rather than a fresh connection
+            response = await self._http.get("/v1/.well-known/ready")
+            if response.status_code == 200:
                 return "healthy"
             else:
                 return "unhealthy"
@@ -0,0 +1,91 @@
+"""
+Local embedding utilities for ContextCloud Agents
+Batch-encodes documents so Weaviate can skip its text2vec-transformers pass on ingest
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Documents encoded per ONNX Runtime call
+EMBED_BATCH_SIZE = 64
+EMBED_MAX_TOKENS = 256
+
+class LocalEmbedder:
+    """Mean-pooled sentence embeddings from an int8-quantized ONNX export (e.g. all-MiniLM-L6-v2)
+
+    The model must be the same one the Weaviate text2vec-transformers module runs,
+    otherwise stored vectors and near_text query vectors live in different spaces.
+    """
+
+    def __init__(self, model_dir: str):
+        # Optional dependencies, only needed when EMBED_MODEL_DIR is configured
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(EMBED_MAX_TOKENS)
+        self.tokenizer.enable_padding()
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, os.getenv("EMBED_MODEL_FILE", "model_quantized.onnx")),
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts in batches of EMBED_BATCH_SIZE, returning unit-length vectors"""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            encodings = self.tokenizer.encode_batch(texts[start:start + EMBED_BATCH_SIZE])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend(pooled.tolist())
+        return vectors
+
+_embedder: Optional[LocalEmbedder] = None
+# Ingest worker threads and query embedding can ask for the model at the same time; load it once
+_embedder_lock = threading.Lock()
+
+def get_embedder() -> Optional[LocalEmbedder]:
+    """Return the shared embedder, or None when EMBED_MODEL_DIR is not set
+
+    The first call loads the tokenizer and ONNX session, so call it from a worker thread.
+    """
+    global _embedder
+    model_dir = os.getenv("EMBED_MODEL_DIR")
+    if not model_dir:
+        return None
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                logger.info(f"🧮 Loading local embedding model from {model_dir}")
+                _embedder = LocalEmbedder(model_dir)
+    return _embedder
+
+def attach_vectors(docs: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return docs with metadata["vector"] filled in wherever it is missing"""
+    embedder = get_embedder()
+    missing = [i for i, (_, metadata) in enumerate(docs) if "vector" not in metadata]
+    if embedder is None or not missing:
+        return docs
+
+    vectors = embedder.embed([docs[i][0] for i in missing])
+    docs = list(docs)
+    for i, vector in zip(missing, vectors):
+        content, metadata = docs[i]
+        docs[i] = (content, {**metadata, "vector": vector})
+    return docs
@@ -0,0 +1,138 @@
+"""
+Graph utilities for ContextCloud Agents
+Struct-of-arrays knowledge graph storage, expanded to node/edge dicts only at the API boundary
+"""
+
+import base64
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+class GraphBuilder:
+    """Knowledge graph holding node dicts plus edges as parallel typed arrays
+
+    Each edge is a (source index, target index, label code) row across three array('i')
+    columns with a shared label vocabulary, instead of one three-key dict per edge.
+    """
+
+    def __init__(self):
+        self.nodes: List[Dict[str, Any]] = []
+        self.node_id_to_idx: Dict[str, int] = {}
+        self.edge_src = array("i")
+        self.edge_dst = array("i")
+        self.edge_labels = array("i")
+        self.label_vocab: Dict[str, int] = {}
+        # (indptr, edge order) over edge_src / edge_dst, built on the first neighbors()/to_csr() call
+        self._adj: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._radj: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def add_node(self, node: Dict[str, Any]) -> int:
+        """Append a node and return its index"""
+        index = len(self.nodes)
+        self.nodes.append(node)
+        self.node_id_to_idx[node["id"]] = index
+        return index
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self.node_id_to_idx
+
+    def add_edge(self, source: str, target: str, label: str):
+        """Append an edge between two existing nodes"""
+        self.edge_src.append(self.node_id_to_idx[source])
+        self.edge_dst.append(self.node_id_to_idx[target])
+        self.edge_labels.append(self.label_vocab.setdefault(label, len(self.label_vocab)))
+        self._adj = self._radj = None
+
+    def add_edges(self, edges: Iterable[Tuple[str, str, str]]):
+        """Append (source, target, label) edges in bulk, extending each column once"""
+        index = self.node_id_to_idx
+        vocab = self.label_vocab
+        rows = [(index[source], index[target], vocab.setdefault(label, len(vocab))) for source, target, label in edges]
+        if not rows:
+            return
+        
+        src, dst, labels = zip(*rows)
+        self.edge_src.extend(src)
+        self.edge_dst.extend(dst)
+        self.edge_labels.extend(labels)
+        self._adj = self._radj = None
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_src)
+
+    def iter_edges(self) -> Iterator[Dict[str, Any]]:
+        """Yield edges as {"source", "target", "label"} dicts in insertion order"""
+        nodes = self.nodes
+        labels = list(self.label_vocab)
+        for src, dst, label in zip(self.edge_src, self.edge_dst, self.edge_labels):
+            yield {"source": nodes[src]["id"], "target": nodes[dst]["id"], "label": labels[label]}
+
+    def neighbors(self, node_id: str) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(neighbor node, edge dict) for every edge touching the node, outgoing then incoming, in insertion order"""
+        index = self.node_id_to_idx[node_id]
+        nodes = self.nodes
+        labels = list(self.label_vocab)
+        pairs = []
+        
+        indptr, order = self._adjacency()
+        for edge in order[indptr[index]:indptr[index + 1]].tolist():
+            target = nodes[self.edge_dst[edge]]
+            pairs.append((target, {"source": node_id, "target": target["id"], "label": labels[self.edge_labels[edge]]}))
+        
+        indptr, order = self._reverse_adjacency()
+        for edge in order[indptr[index]:indptr[index + 1]].tolist():
+            source_index = self.edge_src[edge]
+            if source_index == index:
+                continue  # self-loop, already listed as outgoing
+            source = nodes[source_index]
+            pairs.append((source, {"source": source["id"], "target": node_id, "label": labels[self.edge_labels[edge]]}))
+        
+        return pairs
+
+    def _adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSR row pointers and the edge order that groups edges by source"""
+        if self._adj is None:
+            self._adj = self._group_edges(self.edge_src)
+        return self._adj
+
+    def _reverse_adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSR row pointers and the edge order that groups edges by target"""
+        if self._radj is None:
+            self._radj = self._group_edges(self.edge_dst)
+        return self._radj
+
+    def _group_edges(self, column: array) -> Tuple[np.ndarray, np.ndarray]:
+        ends = np.frombuffer(column, dtype=np.int32)
+        indptr = np.zeros(len(self.nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(ends, minlength=len(self.nodes)), out=indptr[1:])
+        return indptr, np.argsort(ends, kind="stable")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The {"nodes", "edges"} form used by the API (node dicts are shared; copy before mutating)"""
+        return {
+            "nodes": list(self.nodes),
+            "edges": list(self.iter_edges())
+        }
+
+    def to_csr(self) -> Dict[str, Any]:
+        """Edges as CSR arrays over node indices
+
+        Edges of node i are indices[indptr[i]:indptr[i + 1]], with edge_types holding codes into
+        edge_type_names. Arrays are little-endian and base64-encoded so they decode straight into
+        typed arrays in the browser or scipy.sparse.csr_matrix on the server.
+        """
+        indptr, order = self._adjacency()
+        type_names = list(self.label_vocab)
+
+        encode = lambda values, dtype: base64.b64encode(values.astype(dtype).tobytes()).decode("ascii")
+        return {
+            "nodes": list(self.nodes),
+            "indptr": encode(indptr, "<i4"),
+            "indices": encode(np.frombuffer(self.edge_dst, dtype=np.int32)[order], "<i4"),
+            "edge_types": encode(np.frombuffer(self.edge_labels, dtype=np.int32)[order],
+                                 "u1" if len(type_names) <= 256 else "<i4"),
+            "edge_type_names": type_names,
+            "node_count": len(self.nodes),
+            "edge_count": self.edge_count
+        }
@@ -2,11 +2,31 @@
 Logging utilities for ContextCloud Agents
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
-from datetime import datetime
 from typing import Optional
 
+# Every logger enqueues records here; one background listener thread writes them to stdout,
+# so request handlers never block on the stream lock or console I/O
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_LISTENER_STARTED = False
+
+def _start_listener(formatter: logging.Formatter):
+    """Start the shared stdout QueueListener once per process and stop (flush) it at exit"""
+    global _LISTENER_STARTED
+    if _LISTENER_STARTED:
+        return
+    
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    listener = logging.handlers.QueueListener(_log_queue, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _LISTENER_STARTED = True
+
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     """Setup logger with consistent formatting"""
     
@@ -18,19 +38,19 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
     
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, level.upper()))
-    
     # Create formatter
     formatter = logging.Formatter(
         '%(asctime)s | %(name)s | %(levelname)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    console_handler.setFormatter(formatter)
+    _start_listener(formatter)
+    
+    # Create queue handler feeding the shared console listener
+    queue_handler = logging.handlers.QueueHandler(_log_queue)
+    queue_handler.setLevel(getattr(logging, level.upper()))
     
     # Add handler to logger
-    logger.addHandler(console_handler)
+    logger.addHandler(queue_handler)
     
     # Prevent duplicate logs
     logger.propagate = False
@@ -46,29 +66,25 @@ class AgentLogger:
     
     def log_action(self, action: str, details: Optional[str] = None):
         """Log agent action with emoji and formatting"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
         if details:
-            self.logger.info(f"[{self.agent_name}] → {action} ✅ ({details})")
+            self.logger.info("[%s] → %s ✅ (%s)", self.agent_name, action, details)
         else:
-            self.logger.info(f"[{self.agent_name}] → {action} ✅")
+            self.logger.info("[%s] → %s ✅", self.agent_name, action)
     
     def log_error(self, error: str, details: Optional[str] = None):
         """Log agent error"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
         if details:
-            self.logger.error(f"[{self.agent_name}] → ❌ {error} ({details})")
+            self.logger.error("[%s] → ❌ %s (%s)", self.agent_name, error, details)
         else:
-            self.logger.error(f"[{self.agent_name}] → ❌ {error}")
+            self.logger.error("[%s] → ❌ %s", self.agent_name, error)
     
     def log_tool_call(self, tool_name: str, params: dict):
-        """Log tool calling activity"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.logger.info(f"[{self.agent_name}] → 🔧 Calling {tool_name} with params: {params}")
+        """Log tool calling activity (params are only stringified if the record is emitted)"""
+        self.logger.info("[%s] → 🔧 Calling %s with params: %s", self.agent_name, tool_name, params)
     
     def log_result(self, result_summary: str):
         """Log agent result"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.logger.info(f"[{self.agent_name}] → 📊 Result: {result_summary}")
+        self.logger.info("[%s] → 📊 Result: %s", self.agent_name, result_summary)
 
 # Global logger instance
 main_logger = setup_logger("ContextCloud")
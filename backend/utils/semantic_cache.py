@@ -0,0 +1,105 @@
+"""
+Semantic cache utilities for ContextCloud Agents
+Serves repeated and paraphrased queries from memory instead of recomputing them
+"""
+
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import setup_logger
+from utils.vector_index import VectorIndex, use_int8_embeddings
+
+logger = setup_logger(__name__)
+
+_MISS = object()
+
+def _digest(value: Any) -> str:
+    """Stable sha256 key for a JSON-serializable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class SemanticCache:
+    """
+    Two-layer response cache for LLM and vector search calls
+    
+    L1 is an exact lookup on (query, scope). L2 embeds the query and returns the
+    answer of a previously seen query in the same scope when their cosine
+    similarity is at least `threshold`, so paraphrased queries skip the recomputation.
+    """
+    
+    def __init__(self, embed: Callable[[str], Awaitable[Optional[List[float]]]],
+                 threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self._embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, scope, value)
+        self._indexes: Dict[str, VectorIndex] = {}  # scope -> query embeddings of its keys
+        # Bumped by clear(); answers computed across a clear() are returned but not stored
+        self._generation = 0
+    
+    async def get_or_compute(self, query: str, scope: Any, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached answer for query within scope, or compute and store it"""
+        scope_key = _digest(scope)
+        key = _digest({"query": query, "scope": scope_key})
+        generation = self._generation
+        
+        value = self._get(key)
+        if value is not _MISS:
+            logger.info("⚡ Cache hit (exact)")
+            return value
+        
+        embedding = await self._embed(query)
+        index = self._indexes.get(scope_key)
+        if embedding is not None and index is not None:
+            matches = index.search(embedding, 1)
+            if matches and matches[0][1] >= self.threshold:
+                value = self._get(matches[0][0])
+                if value is not _MISS:
+                    logger.info(f"⚡ Cache hit (semantic, similarity {matches[0][1]:.3f})")
+                    if generation == self._generation:
+                        self._put(key, scope_key, value, None)
+                    return value
+        
+        value = await compute()
+        # A clear() while computing means the answer may predate the write that invalidated the cache
+        if generation == self._generation:
+            self._put(key, scope_key, value, embedding)
+        return value
+    
+    def _get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS
+        if entry[0] < time.monotonic():
+            self._evict(key)
+            return _MISS
+        self._entries.move_to_end(key)
+        return entry[2]
+    
+    def _put(self, key: str, scope_key: str, value: Any, embedding: Optional[List[float]]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, scope_key, value)
+        self._entries.move_to_end(key)
+        if embedding is not None:
+            index = self._indexes.get(scope_key)
+            if index is None:
+                index = self._indexes[scope_key] = VectorIndex(len(embedding), quantize=use_int8_embeddings(), capacity=16)
+            index.add(key, embedding)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+    
+    def _evict(self, key: str):
+        _, scope_key, _ = self._entries.pop(key)
+        index = self._indexes.get(scope_key)
+        if index is not None:
+            index.remove(key)
+            if not len(index):
+                del self._indexes[scope_key]
+    
+    def clear(self):
+        """Drop every cached answer, including ones still being computed"""
+        self._generation += 1
+        self._entries.clear()
+        self._indexes.clear()
@@ -0,0 +1,107 @@
+"""
+Vector index utilities for ContextCloud Agents
+In-memory cosine similarity search over int8-quantized embeddings
+"""
+
+import os
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+import numpy as np
+
+# Rows scored per block so int8 codes are never upcast all at once
+SEARCH_BLOCK_ROWS = 4096
+
+def use_int8_embeddings() -> bool:
+    """Int8 storage can be switched off with EMBEDDING_INT8=0"""
+    return os.getenv("EMBEDDING_INT8", "1") == "1"
+
+def normalize(vector: Sequence[float]) -> np.ndarray:
+    """Return the vector as a unit-length float32 array"""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 quantization, returning the codes and their float32 scale"""
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    codes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+class VectorIndex:
+    """Cosine similarity index that stores embeddings as int8 codes plus a per-row scale"""
+
+    def __init__(self, dim: int, quantize: bool = True, capacity: int = 1024):
+        self.dim = dim
+        self.quantize = quantize
+        self._vectors = np.empty((capacity, dim), dtype=np.int8 if quantize else np.float32)
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._keys: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    def add(self, key: Hashable, vector: Sequence[float]):
+        """Insert or replace the embedding stored under key"""
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._vectors):
+                self._grow()
+            self._keys.append(key)
+            self._rows[key] = row
+
+        unit = normalize(vector)
+        if self.quantize:
+            self._vectors[row], self._scales[row] = quantize_int8(unit)
+        else:
+            self._vectors[row] = unit
+
+    def remove(self, key: Hashable):
+        """Drop key by moving the last row into its slot"""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._vectors[row] = self._vectors[last]
+            self._scales[row] = self._scales[last]
+            self._keys[row] = moved
+            self._rows[moved] = row
+        self._keys.pop()
+
+    def search(self, vector: Sequence[float], k: int = 1) -> List[Tuple[Any, float]]:
+        """Return up to k (key, cosine similarity) pairs, best first"""
+        n = len(self._keys)
+        if n == 0 or k <= 0:
+            return []
+
+        query = normalize(vector)
+        if self.quantize:
+            codes, query_scale = quantize_int8(query)
+            query = codes.astype(np.float32)
+
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, n)
+            scores[start:stop] = self._vectors[start:stop] @ query
+        if self.quantize:
+            scores *= self._scales[:n] * query_scale
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._keys[i], float(scores[i])) for i in top]
+
+    def _grow(self):
+        """Double the preallocated capacity"""
+        capacity = max(1, len(self._vectors) * 2)
+        vectors = np.empty((capacity, self.dim), dtype=self._vectors.dtype)
+        vectors[:len(self._vectors)] = self._vectors
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:len(self._scales)] = self._scales
+        self._vectors, self._scales = vectors, scales